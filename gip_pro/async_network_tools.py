@@ -0,0 +1,164 @@
+# Versión asyncio de NetworkTools para operar sobre varias interfaces a la vez
+import asyncio
+from typing import Dict, Iterable, List
+
+from . import dns_resolver, host_sweep, icmp
+from .network_backends import empty_state, mask_to_prefix
+from .network_tools import NetworkTools
+
+
+class AsyncNetworkTools:
+    """
+    Operaciones de NetworkTools como corrutinas.
+
+    Los comandos se lanzan con asyncio.create_subprocess_exec (netlink no
+    lanza procesos), así que configurar N interfaces tarda lo que la más
+    lenta y no la suma de todas. Como mucho `max_concurrency` operaciones
+    corren a la vez, y nunca dos sobre la misma interfaz.
+
+    El planificador, la comprobación de privilegios y el registro son los
+    de NetworkTools.
+    """
+
+    def __init__(self, logger=None, backend=None, max_concurrency: int = 8):
+        """
+        Args:
+            logger: NetworkLogger donde registrar las operaciones
+            backend: NetworkBackend o nombre de backend (ver NetworkTools)
+            max_concurrency: operaciones simultáneas como máximo
+        """
+        self.tools = NetworkTools(logger, backend)
+        self.logger = logger
+        self.backend = self.tools.backend
+        self.max_concurrency = max_concurrency
+        self.resolver = dns_resolver.Resolver()
+        # Se crean dentro del bucle de eventos que los usa
+        self._loop = None
+        self._semaphore = None
+        self._interface_locks: Dict[str, asyncio.Lock] = {}
+
+    def _slot(self, interface):
+        """Cerrojo de la interfaz y semáforo global, en ese orden"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._interface_locks = {}
+        lock = self._interface_locks.get(interface)
+        if lock is None:
+            lock = self._interface_locks[interface] = asyncio.Lock()
+        return lock, self._semaphore
+
+    async def get_interface_state(self, interface):
+        """Ver NetworkTools.get_interface_state"""
+        lock, semaphore = self._slot(interface)
+        async with lock, semaphore:
+            try:
+                return await self.backend.aget_state(interface)
+            except Exception:
+                return empty_state()
+
+    async def apply_profile(self, profile, log=True):
+        """
+        Aplica un perfil ejecutando solo los comandos que hacen falta.
+
+        Returns:
+            El plan aplicado (ver NetworkTools.plan_profile)
+        """
+        self.tools._require_admin(self.backend, 'Se requieren privilegios de administrador para aplicar el perfil.')
+
+        interface = profile['interface']
+        lock, semaphore = self._slot(interface)
+        # El cerrojo cubre lectura y cambio: el plan no puede quedar obsoleto
+        async with lock, semaphore:
+            try:
+                state = await self.backend.aget_state(interface)
+            except Exception:
+                state = empty_state()
+            plan = self.tools.plan_profile(profile, state)
+            if plan['changes']:
+                await self.backend.aapply(plan)
+
+        if self.logger and log:
+            self.logger.log_event('apply_profile', {
+                'interface': plan['interface'],
+                'changes': ','.join(plan['changes']) or 'none',
+                'reconnect': plan['reconnect']
+            })
+        return plan
+
+    async def apply_profiles(self, profiles: Iterable[Dict]) -> List:
+        """
+        Aplica varios perfiles a la vez (los de una misma interfaz, en orden).
+
+        Returns:
+            Lista con el plan de cada perfil, o la excepción si falló
+        """
+        return await asyncio.gather(*(self.apply_profile(profile) for profile in profiles),
+                                    return_exceptions=True)
+
+    async def change_ip(self, interface, ip, mask, gateway):
+        self.tools._require_admin(self.backend, 'Se requieren privilegios de administrador para cambiar la IP.')
+
+        plan = await self.apply_profile({'interface': interface, 'ip': ip, 'mask': mask, 'gateway': gateway}, log=False)
+
+        if self.logger:
+            self.logger.log_event('change_ip', {'interface': interface, 'ip': ip, 'mask': mask, 'gateway': gateway,
+                                                'changes': len(plan['changes'])})
+
+    async def set_interface_address(self, interface, ip, mask, gateway=None):
+        """Ver NetworkTools.set_interface_address"""
+        backend = self.tools._kernel_backend()
+        self.tools._require_admin(backend, 'Se requieren privilegios de administrador para cambiar la IP.')
+        lock, semaphore = self._slot(interface)
+        async with lock, semaphore:
+            await backend.aset_address(interface, ip, mask_to_prefix(mask), gateway or None)
+
+        if self.logger:
+            self.logger.log_event('change_ip', {'interface': interface, 'ip': ip, 'mask': mask,
+                                                'gateway': gateway, 'backend': backend.name})
+
+    async def set_link_state(self, interface, up=True):
+        """Ver NetworkTools.set_link_state"""
+        backend = self.tools._kernel_backend()
+        self.tools._require_admin(backend, 'Se requieren privilegios de administrador para cambiar la interfaz.')
+        lock, semaphore = self._slot(interface)
+        async with lock, semaphore:
+            await backend.aset_link(interface, up)
+
+    async def set_dns(self, interface, dns1, dns2=None):
+        self.tools._require_admin(self.backend, 'Se requieren privilegios de administrador para cambiar DNS.')
+
+        await self.apply_profile({'interface': interface, 'dns1': dns1, 'dns2': dns2}, log=False)
+
+        if self.logger:
+            self.logger.log_event('set_dns', {'interface': interface, 'dns1': dns1, 'dns2': dns2})
+
+    async def restore_dhcp(self, interface):
+        self.tools._require_admin(self.backend, 'Se requieren privilegios de administrador para restaurar DHCP.')
+
+        lock, semaphore = self._slot(interface)
+        async with lock, semaphore:
+            await self.backend.arestore_dhcp(interface)
+
+        if self.logger:
+            self.logger.log_event('restore_dhcp', {'interface': interface})
+
+    async def ping_hosts(self, targets, count=1, timeout=icmp.DEFAULT_TIMEOUT, interval=icmp.DEFAULT_INTERVAL):
+        """Ver NetworkTools.ping_hosts"""
+        return await icmp.ping_many(list(targets), count, timeout, interval)
+
+    def sweep(self, cidr, **options):
+        """
+        Iterador asíncrono con el resultado de cada dirección de la subred
+        según llega (ver NetworkTools.sweep y host_sweep.sweep)
+        """
+        return host_sweep.sweep(cidr, **options)
+
+    async def dns_lookup(self, domain, record_type='A'):
+        """Ver Resolver.query"""
+        return await self.resolver.query(domain, record_type)
+
+    async def dns_lookup_many(self, domains, record_type='A'):
+        """Ver Resolver.query_many"""
+        return await self.resolver.query_many(list(domains), record_type)
@@ -0,0 +1,160 @@
+# Comparativa de latencia de los presets de DNS
+import asyncio
+import json
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .dns_resolver import DNS_PORT, Resolver
+
+DNS_PRESETS_PATH = os.path.join(os.path.dirname(__file__), 'data', 'dns_presets.json')
+DNS_BENCHMARK_PATH = os.path.join(os.path.dirname(__file__), 'data', 'dns_benchmark.json')
+
+# Dominios consultados por defecto: populares, con respuestas en caché en
+# los resolvedores públicos, para medir la red y no la recursión
+DEFAULT_DOMAINS = [
+    'google.com', 'youtube.com', 'facebook.com', 'wikipedia.org', 'amazon.com',
+    'microsoft.com', 'apple.com', 'github.com', 'cloudflare.com', 'netflix.com',
+    'whatsapp.com', 'instagram.com', 'linkedin.com', 'mercadolibre.com', 'yahoo.com'
+]
+
+# Por encima de esta tasa de fallos un preset queda detrás de los fiables
+MAX_FAILURE_RATE = 0.05
+
+
+def load_presets(path: str = DNS_PRESETS_PATH) -> Dict[str, Dict]:
+    """Presets {clave: {'name', 'primary', 'secondary'}} de dns_presets.json"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('dns_presets', {})
+    except Exception as e:
+        print(f"Error al cargar presets de DNS: {str(e)}")
+        return {}
+
+
+def parse_server(value: str) -> Tuple[str, int]:
+    """
+    Dirección y puerto de un servidor: '1.1.1.1', '127.0.0.1:5353',
+    '2606:4700:4700::1111' o '[2606:4700:4700::1111]:5353'. Una IPv6 sin
+    corchetes nunca lleva puerto.
+    """
+    value = value.strip()
+    if value.startswith('['):
+        host, _, port = value[1:].partition(']')
+        port = port[1:] if port.startswith(':') else ''
+        return host, int(port) if port.isdigit() else DNS_PORT
+    if value.count(':') == 1:
+        host, _, port = value.partition(':')
+        if host and port.isdigit():
+            return host, int(port)
+    return value, DNS_PORT
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Percentil por interpolación lineal sobre valores ordenados"""
+    if not values:
+        return None
+    position = (len(values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+async def _measure(key: str, preset: Dict, domains: List[str], rounds: int, timeout: float) -> Dict:
+    servers = [parse_server(preset[field]) for field in ('primary', 'secondary') if preset.get(field)]
+    # Sin caché ni reintentos: cada consulta mide un viaje real al servidor
+    resolver = Resolver(servers, timeout=timeout, attempts=1, cache=False)
+    results = []
+    for _ in range(rounds):
+        # Una ronda tras otra: dentro de una ronda no hay nombres repetidos
+        # que el resolvedor pudiera unir en una sola consulta
+        results += await resolver.query_many(domains)
+
+    latencies = sorted(result['latency_ms'] for result in results
+                       if result['error'] is None and result['rcode'] in ('NOERROR', 'NXDOMAIN'))
+    failures = len(results) - len(latencies)
+    return {
+        'preset': key,
+        'name': preset.get('name', key),
+        'primary': preset.get('primary'),
+        'secondary': preset.get('secondary'),
+        'queries': len(results),
+        'failures': failures,
+        'failure_rate': round(failures / len(results), 4) if results else 1.0,
+        'p50': _round(percentile(latencies, 0.50)),
+        'p95': _round(percentile(latencies, 0.95)),
+        'p99': _round(percentile(latencies, 0.99)),
+        'measured_at': time.time()
+    }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
+
+
+def rank(results: Iterable[Dict]) -> List[Dict]:
+    """
+    Ordena de mejor a peor: primero los que fallan menos de
+    MAX_FAILURE_RATE, luego los demás y al final los que no respondieron;
+    dentro de cada grupo, por p50, p95 y tasa de fallos.
+    """
+    def key(result):
+        if result['p50'] is None:
+            return (2, 0, 0, result['failure_rate'])
+        return (int(result['failure_rate'] > MAX_FAILURE_RATE), result['p50'], result['p95'],
+                result['failure_rate'])
+    ranked = sorted(results, key=key)
+    for position, result in enumerate(ranked, start=1):
+        result['rank'] = position
+    return ranked
+
+
+async def benchmark(presets: Optional[Dict[str, Dict]] = None, domains: Optional[Iterable[str]] = None,
+                    rounds: int = 3, timeout: float = 2.0) -> List[Dict]:
+    """
+    Mide todos los presets a la vez con el mismo conjunto de dominios.
+
+    Args:
+        presets: {clave: {'name', 'primary', 'secondary'}}; por defecto los
+            de dns_presets.json. Los servidores admiten 'dirección:puerto'
+            y '[IPv6]:puerto' (ver parse_server)
+        domains: dominios a consultar (DEFAULT_DOMAINS por defecto)
+        rounds: veces que se consulta cada dominio
+        timeout: espera por consulta (segundos); pasado, cuenta como fallo
+
+    Returns:
+        Resultados ordenados (ver rank), con preset, name, primary,
+        secondary, queries, failures, failure_rate, p50, p95, p99 (ms),
+        measured_at y rank
+    """
+    presets = load_presets() if presets is None else presets
+    domains = list(dict.fromkeys(domains or DEFAULT_DOMAINS))
+    results = await asyncio.gather(*(_measure(key, preset, domains, rounds, timeout)
+                                      for key, preset in presets.items()))
+    return rank(results)
+
+
+def save_results(results: List[Dict], path: str = DNS_BENCHMARK_PATH):
+    """Guarda la última medición de cada preset (se conservan los no medidos)"""
+    data = load_results(path)
+    for result in results:
+        data[result['preset']] = result
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'results': data}, f, indent=2)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"Error al guardar la comparativa de DNS: {str(e)}")
+
+
+def load_results(path: str = DNS_BENCHMARK_PATH) -> Dict[str, Dict]:
+    """Última medición de cada preset {clave: resultado}; vacío si no hay"""
+    try:
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('results', {})
+    except Exception as e:
+        print(f"Error al cargar la comparativa de DNS: {str(e)}")
+    return {}
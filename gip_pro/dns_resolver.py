@@ -0,0 +1,412 @@
+# Resolvedor DNS asíncrono con caché
+# Construye y analiza mensajes DNS (RFC 1035) y los envía por UDP, con
+# reintento por TCP si la respuesta llega truncada.
+import asyncio
+import ipaddress
+import random
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+DNS_PORT = 53
+RESOLV_CONF = '/etc/resolv.conf'
+FALLBACK_SERVERS = ['8.8.8.8', '1.1.1.1']
+
+RECORD_TYPES = {'A': 1, 'NS': 2, 'CNAME': 5, 'SOA': 6, 'PTR': 12, 'MX': 15, 'TXT': 16, 'AAAA': 28, 'SRV': 33, 'ANY': 255}
+RECORD_NAMES = {value: name for name, value in RECORD_TYPES.items()}
+RCODES = {0: 'NOERROR', 1: 'FORMERR', 2: 'SERVFAIL', 3: 'NXDOMAIN', 4: 'NOTIMP', 5: 'REFUSED'}
+
+CLASS_IN = 1
+FLAG_QR = 0x8000
+FLAG_TC = 0x0200
+FLAG_RD = 0x0100
+
+_HEADER = struct.Struct('!HHHHHH')  # id, flags, qdcount, ancount, nscount, arcount
+_RR = struct.Struct('!HHIH')  # type, class, ttl, rdlength
+
+# TTL de las respuestas negativas sin SOA y tope de las negativas (RFC 2308)
+DEFAULT_NEGATIVE_TTL = 60
+MAX_NEGATIVE_TTL = 300
+
+
+class DNSError(Exception):
+    """Respuesta DNS mal formada o que no corresponde a la consulta"""
+
+
+def build_query(name: str, qtype: int, query_id: int) -> bytes:
+    """Mensaje de consulta con recursión deseada (`name` ya en ASCII/punycode)"""
+    question = b''
+    for label in name.rstrip('.').split('.'):
+        if label:
+            encoded = label.encode('ascii')
+            if len(encoded) > 63:
+                raise ValueError(f'Etiqueta demasiado larga: {label}')
+            question += bytes([len(encoded)]) + encoded
+    question += b'\0' + struct.pack('!HH', qtype, CLASS_IN)
+    return _HEADER.pack(query_id, FLAG_RD, 1, 0, 0, 0) + question
+
+
+def _read_name(data: bytes, offset: int) -> Tuple[str, int]:
+    """Lee un nombre (con punteros de compresión); devuelve (nombre, siguiente offset)"""
+    labels = []
+    end = None
+    jumps = 0
+    while True:
+        if offset >= len(data):
+            raise DNSError('Nombre truncado')
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if offset + 1 >= len(data) or jumps > 63:
+                raise DNSError('Puntero de compresión inválido')
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+            jumps += 1
+            continue
+        offset += 1
+        if length == 0:
+            break
+        labels.append(data[offset:offset + length].decode('ascii', errors='replace'))
+        offset += length
+    return '.'.join(labels) or '.', end if end is not None else offset
+
+
+def _read_rdata(data: bytes, offset: int, rtype: int, length: int):
+    rdata = data[offset:offset + length]
+    if rtype == 1 and length == 4:
+        return str(ipaddress.IPv4Address(rdata))
+    if rtype == 28 and length == 16:
+        return str(ipaddress.IPv6Address(rdata))
+    if rtype in (2, 5, 12):
+        return _read_name(data, offset)[0]
+    if rtype == 15:
+        return f'{struct.unpack_from("!H", data, offset)[0]} {_read_name(data, offset + 2)[0]}'
+    if rtype == 16:
+        texts = []
+        position = 0
+        while position < length:
+            size = rdata[position]
+            texts.append(rdata[position + 1:position + 1 + size].decode('utf-8', errors='replace'))
+            position += 1 + size
+        return ' '.join(texts)
+    if rtype == 6:
+        mname, position = _read_name(data, offset)
+        rname, position = _read_name(data, position)
+        serial, refresh, retry, expire, minimum = struct.unpack_from('!IIIII', data, position)
+        return {'mname': mname, 'rname': rname, 'serial': serial, 'minimum': minimum}
+    if rtype == 33:
+        priority, weight, port = struct.unpack_from('!HHH', data, offset)
+        return f'{priority} {weight} {port} {_read_name(data, offset + 6)[0]}'
+    return rdata.hex()
+
+
+def parse_response(data: bytes) -> Dict:
+    """
+    Analiza un mensaje de respuesta.
+
+    Returns:
+        dict con id, rcode, truncated, question (nombre, tipo), answers y
+        authority (listas de {'name', 'type', 'ttl', 'data'})
+
+    Raises:
+        DNSError si el mensaje está mal formado
+    """
+    if len(data) < _HEADER.size:
+        raise DNSError('Respuesta demasiado corta')
+    query_id, flags, qdcount, ancount, nscount, _ = _HEADER.unpack_from(data)
+    if not flags & FLAG_QR:
+        raise DNSError('El mensaje no es una respuesta')
+    offset = _HEADER.size
+    question = None
+    try:
+        for _ in range(qdcount):
+            name, offset = _read_name(data, offset)
+            qtype, _ = struct.unpack_from('!HH', data, offset)
+            offset += 4
+            question = (name, qtype)
+        sections = []
+        for count in (ancount, nscount):
+            records = []
+            for _ in range(count):
+                name, offset = _read_name(data, offset)
+                rtype, _, ttl, length = _RR.unpack_from(data, offset)
+                offset += _RR.size
+                if offset + length > len(data):
+                    raise DNSError('Registro truncado')
+                records.append({'name': name, 'type': RECORD_NAMES.get(rtype, str(rtype)), 'ttl': ttl,
+                                'data': _read_rdata(data, offset, rtype, length)})
+                offset += length
+            sections.append(records)
+    except struct.error as e:
+        raise DNSError(f'Respuesta truncada: {e}') from e
+    return {'id': query_id, 'rcode': RCODES.get(flags & 0xF, str(flags & 0xF)),
+            'truncated': bool(flags & FLAG_TC), 'question': question,
+            'answers': sections[0], 'authority': sections[1]}
+
+
+def system_servers(path: str = RESOLV_CONF) -> List[str]:
+    """Servidores de /etc/resolv.conf (vacío si no existe, p. ej. en Windows)"""
+    servers = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == 'nameserver':
+                    servers.append(parts[1])
+    except OSError:
+        pass
+    return servers
+
+
+class DNSCache:
+    """
+    Caché LRU de respuestas que respeta su TTL.
+
+    Las respuestas negativas (NXDOMAIN o sin registros) se guardan con el
+    TTL de la SOA de la respuesta (RFC 2308), o DEFAULT_NEGATIVE_TTL si no
+    trae SOA, con un máximo de MAX_NEGATIVE_TTL.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Tuple[str, int], Tuple[float, Dict]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str, qtype: int) -> Optional[Dict]:
+        key = (name.lower().rstrip('.'), qtype)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            expires, result = entry
+        remaining = max(0, int(expires - time.monotonic()))
+        answers = [dict(answer, ttl=min(answer['ttl'], remaining)) for answer in result['answers']]
+        return dict(result, answers=answers, cached=True, latency_ms=0.0)
+
+    def put(self, name: str, qtype: int, result: Dict):
+        if result['rcode'] == 'NOERROR' and result['answers']:
+            ttl = min(answer['ttl'] for answer in result['answers'])
+        elif result['rcode'] in ('NOERROR', 'NXDOMAIN'):
+            soa = [record for record in result.get('authority', []) if record['type'] == 'SOA']
+            if soa:
+                ttl = min(soa[0]['ttl'], soa[0]['data']['minimum'])
+            else:
+                ttl = DEFAULT_NEGATIVE_TTL
+            ttl = min(ttl, MAX_NEGATIVE_TTL)
+        else:
+            return  # SERVFAIL, REFUSED...: no se guardan
+        if ttl <= 0:
+            return
+        key = (name.lower().rstrip('.'), qtype)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class _UDPQuery(asyncio.DatagramProtocol):
+    """Espera la primera respuesta con el id de la consulta"""
+
+    def __init__(self, query_id: int, future: asyncio.Future):
+        self.query_id = query_id
+        self.future = future
+
+    def datagram_received(self, data, addr):
+        if len(data) >= 2 and struct.unpack_from('!H', data)[0] == self.query_id and not self.future.done():
+            self.future.set_result(data)
+
+    def error_received(self, exc):
+        if not self.future.done():
+            self.future.set_exception(exc)
+
+
+Server = Union[str, Tuple[str, int]]
+
+
+class Resolver:
+    """
+    Resolvedor DNS asíncrono.
+
+    Cada consulta sale por UDP desde un socket propio (puerto de origen
+    aleatorio) y, si la respuesta llega truncada, se repite por TCP. Si un
+    servidor no responde se prueba el siguiente. Las consultas iguales que
+    están en curso a la vez comparten una sola petición.
+
+    Uso:
+        resolver = Resolver(['1.1.1.1'])
+        result = await resolver.query('example.com', 'A')
+        results = await resolver.query_many(names)
+    """
+
+    def __init__(self, servers: Optional[Iterable[Server]] = None, timeout: float = 2.0,
+                 attempts: int = 2, cache: Optional[DNSCache] = None, max_concurrency: int = 256):
+        """
+        Args:
+            servers: direcciones o (dirección, puerto); por defecto las del
+                sistema
+            timeout: espera por cada intento (segundos)
+            attempts: vueltas completas a la lista de servidores
+            cache: DNSCache a usar (None crea una; False la desactiva)
+            max_concurrency: consultas en vuelo como máximo
+        """
+        servers = list(servers or system_servers() or FALLBACK_SERVERS)
+        self.servers = [(server, DNS_PORT) if isinstance(server, str) else tuple(server) for server in servers]
+        self.timeout = timeout
+        self.attempts = attempts
+        # DNSCache define __len__: una caché vacía también es falsa
+        self.cache = DNSCache() if cache is None else (None if cache is False else cache)
+        self.max_concurrency = max_concurrency
+        self._loop = None
+        self._semaphore = None
+        self._inflight: Dict[Tuple[str, int], asyncio.Future] = {}
+
+    def _prepare(self):
+        """Semáforo y consultas en curso del bucle de eventos actual"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._inflight = {}
+        return loop
+
+    async def _udp(self, loop, server, message: bytes, query_id: int) -> bytes:
+        future = loop.create_future()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _UDPQuery(query_id, future), remote_addr=server)
+        try:
+            transport.sendto(message)
+            return await asyncio.wait_for(future, self.timeout)
+        finally:
+            transport.close()
+
+    async def _tcp(self, server, message: bytes) -> bytes:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(*server), self.timeout)
+        try:
+            writer.write(struct.pack('!H', len(message)) + message)
+            length = struct.unpack('!H', await asyncio.wait_for(reader.readexactly(2), self.timeout))[0]
+            return await asyncio.wait_for(reader.readexactly(length), self.timeout)
+        finally:
+            writer.close()
+
+    async def _exchange(self, loop, name: str, qtype: int) -> Dict:
+        """Envía la consulta a los servidores hasta obtener una respuesta válida"""
+        errors = []
+        for _ in range(self.attempts):
+            for server in self.servers:
+                query_id = random.getrandbits(16)
+                message = build_query(name, qtype, query_id)
+                try:
+                    response = parse_response(await self._udp(loop, server, message, query_id))
+                    if response['truncated']:
+                        response = parse_response(await self._tcp(server, message))
+                    question = response['question']
+                    if response['id'] != query_id or not question or question[0].lower() != name.lower().rstrip('.') \
+                            or question[1] != qtype:
+                        raise DNSError('La respuesta no corresponde a la consulta')
+                    if response['rcode'] in ('SERVFAIL', 'REFUSED'):
+                        errors.append(f"{server[0]}: {response['rcode']}")
+                        continue
+                    response['server'] = server[0]
+                    return response
+                except asyncio.TimeoutError:
+                    errors.append(f'{server[0]}: sin respuesta')
+                except (OSError, DNSError, asyncio.IncompleteReadError) as e:
+                    errors.append(f'{server[0]}: {e}')
+        raise DNSError('; '.join(errors) or 'Sin servidores DNS')
+
+    async def query(self, name: str, record_type: str = 'A') -> Dict:
+        """
+        Resuelve un nombre.
+
+        Returns:
+            dict con name, type, rcode ('NOERROR', 'NXDOMAIN'...), answers
+            (lista de {'name', 'type', 'ttl', 'data'}), server, latency_ms,
+            cached y error (mensaje si no hubo respuesta válida)
+        """
+        record_type = record_type.upper()
+        qtype = RECORD_TYPES.get(record_type)
+        if qtype is None:
+            raise ValueError(f'Tipo de registro no soportado: {record_type}')
+        name = name.strip().rstrip('.')
+        if record_type == 'PTR' and _is_address(name):
+            name = ipaddress.ip_address(name).reverse_pointer
+        try:
+            # Los nombres internacionales viajan en punycode
+            name = name.encode('idna').decode('ascii')
+        except UnicodeError as e:
+            raise ValueError(f'Nombre inválido: {name}') from e
+
+        if self.cache is not None:
+            cached = self.cache.get(name, qtype)
+            if cached is not None:
+                return cached
+
+        loop = self._prepare()
+        key = (name.lower(), qtype)
+        shared = self._inflight.get(key)
+        if shared is not None:
+            return dict(await asyncio.shield(shared))
+        future = self._inflight[key] = loop.create_future()
+
+        start = time.perf_counter()
+        result = {'name': name, 'type': RECORD_NAMES.get(qtype, str(qtype)), 'rcode': None, 'answers': [],
+                  'authority': [], 'server': None, 'latency_ms': None, 'cached': False, 'error': None}
+        try:
+            async with self._semaphore:
+                start = time.perf_counter()  # La latencia no incluye la espera en cola
+                response = await self._exchange(loop, name, qtype)
+            result.update(rcode=response['rcode'], answers=response['answers'],
+                          authority=response['authority'], server=response['server'])
+            if self.cache is not None:
+                self.cache.put(name, qtype, result)
+        except (DNSError, ValueError) as e:
+            result['error'] = str(e)
+        finally:
+            result['latency_ms'] = round((time.perf_counter() - start) * 1000, 3)
+            del self._inflight[key]
+            future.set_result(result)
+        return result
+
+    async def query_many(self, names: Iterable[str], record_type: str = 'A') -> List[Dict]:
+        """Resuelve muchos nombres a la vez; resultados en el mismo orden"""
+        return await asyncio.gather(*(self.query(name, record_type) for name in names))
+
+
+def _is_address(value: str) -> bool:
+    try:
+        ipaddress.ip_address(value)
+        return True
+    except ValueError:
+        return False
+
+
+def format_result(result: Dict) -> str:
+    """Resumen legible de una consulta"""
+    if result['error']:
+        return f"Error al consultar {result['name']}: {result['error']}"
+    source = 'caché' if result['cached'] else f"servidor {result['server']}"
+    lines = [f"{result['name']} {result['type']}: {result['rcode']} ({result['latency_ms']:.1f} ms, {source})"]
+    for answer in result['answers']:
+        lines.append(f"  {answer['name']}  {answer['type']}  {answer['data']}  TTL {answer['ttl']}")
+    if result['rcode'] == 'NOERROR' and not result['answers']:
+        lines.append('  Sin registros de ese tipo')
+    elif result['rcode'] == 'NXDOMAIN':
+        lines.append('  El dominio no existe')
+    return '\n'.join(lines)
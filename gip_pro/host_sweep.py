@@ -0,0 +1,283 @@
+# Descubrimiento de hosts en una subred (ping ICMP y conexiones TCP)
+import asyncio
+import errno
+import ipaddress
+import json
+import os
+import time
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from . import icmp
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SWEEP_CACHE_DIR = os.path.join(os.path.dirname(__file__), 'data', 'sweeps')
+
+# Subred más grande que se barre (/16 = 65536 direcciones)
+MIN_PREFIX = 16
+
+# Puertos TCP que se prueban junto con el ping
+DEFAULT_PORTS = (80, 443, 22)
+
+# Errores de conexión que indican que el host existe y respondió
+_ALIVE_ERRNOS = {errno.ECONNREFUSED, errno.ECONNRESET}
+
+
+class AdaptiveLimiter:
+    """
+    Ventana de concurrencia AIMD (como el control de congestión de TCP).
+
+    Empieza en arranque lento (+1 por sondeo sin pérdidas) hasta el primer
+    umbral; después crece 1/ventana por sondeo (unos +1 por ventana
+    completa). Cada pérdida la reduce a la mitad, como mucho una vez por
+    `cooldown` segundos para no desplomarla con una ráfaga de pérdidas de
+    la misma congestión.
+    """
+
+    def __init__(self, initial: int = 64, minimum: int = 8, maximum: int = 1024,
+                 cooldown: float = 1.0):
+        self.window = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.cooldown = cooldown
+        self.threshold = float(maximum)
+        self.in_flight = 0
+        self.losses = 0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.window))
+            self.in_flight += 1
+
+    async def release(self, loss: bool = False):
+        async with self._condition:
+            self.in_flight -= 1
+            if loss:
+                self.losses += 1
+                now = time.monotonic()
+                if now - self._last_decrease >= self.cooldown:
+                    self._last_decrease = now
+                    self.window = self.threshold = max(self.minimum, self.window / 2)
+            elif self.window < self.threshold:
+                self.window = min(self.maximum, self.window + 1)
+            else:
+                self.window = min(self.maximum, self.window + 1 / self.window)
+            self._condition.notify_all()
+
+
+class SweepCache:
+    """
+    Hosts vivos de una subred y cuándo se comprobaron, en JSON
+    (data/sweeps/<red>_<prefijo>.json).
+    """
+
+    def __init__(self, cidr: str, directory: str = SWEEP_CACHE_DIR):
+        self.cidr = cidr
+        self.path = os.path.join(directory, cidr.replace('/', '_') + '.json')
+        self.hosts: Dict[str, Dict] = {}
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.hosts = json.load(f).get('hosts', {})
+        except Exception as e:
+            print(f"Error al cargar la caché de barrido: {str(e)}")
+
+    def is_fresh(self, address: str, max_age: float, now: float) -> bool:
+        """Si la dirección estaba viva hace menos de `max_age` segundos"""
+        entry = self.hosts.get(address)
+        return bool(entry and entry['alive'] and now - entry['checked'] < max_age)
+
+    def update(self, result: Dict):
+        # Solo se guardan los vivos: los muertos se vuelven a sondear igual
+        if result['alive']:
+            self.hosts[result['address']] = {key: result[key] for key in ('alive', 'checked', 'rtt', 'method')}
+        else:
+            self.hosts.pop(result['address'], None)
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': 1, 'cidr': self.cidr, 'hosts': self.hosts}, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error al guardar la caché de barrido: {str(e)}")
+
+
+def _tcp_limit(ports: int, maximum: int) -> int:
+    """Ventana máxima que cabe en el límite de descriptores abiertos"""
+    if resource is None or not ports:
+        return maximum
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY:
+        return maximum
+    return max(1, min(maximum, (soft - 64) // ports))
+
+
+async def _tcp_probe(address: str, port: int, timeout: float) -> Optional[Tuple[float, str]]:
+    """Conexión TCP: aceptada o rechazada significa que el host existe"""
+    start = time.perf_counter()
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(address, port), timeout)
+    except asyncio.TimeoutError:
+        return None
+    except OSError as e:
+        if e.errno in _ALIVE_ERRNOS:
+            return (time.perf_counter() - start) * 1000, f'tcp-rst:{port}'
+        return None
+    writer.close()
+    return (time.perf_counter() - start) * 1000, f'tcp:{port}'
+
+
+async def _probe(pinger: Optional[icmp.Pinger], address: str, ports: Iterable[int],
+                 timeout: float, retries: int) -> Tuple[Dict, bool]:
+    """
+    Sondea una dirección: primero un eco ICMP y, si no responde, los
+    reintentos y las conexiones TCP a la vez; gana la primera respuesta.
+
+    Returns:
+        (resultado, loss); loss indica que un eco solo respondió al
+        reintentarlo, señal de que se están perdiendo paquetes
+    """
+    result = {'address': address, 'alive': False, 'rtt': None, 'method': None,
+              'checked': time.time(), 'cached': False}
+    if pinger is not None:
+        reply = await pinger.echo(address, timeout)
+        if reply is not None:
+            result.update(alive=True, rtt=round(reply[0], 3), method='icmp')
+            return result, False
+
+    tasks = {asyncio.ensure_future(_tcp_probe(address, port, timeout)): False for port in ports}
+    if pinger is not None:
+        for _ in range(retries):
+            tasks[asyncio.ensure_future(pinger.echo(address, timeout))] = True
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                reply = task.result()
+                if reply is None:
+                    continue
+                is_echo = tasks[task]
+                result.update(alive=True, rtt=round(reply[0], 3), method='icmp' if is_echo else reply[1])
+                return result, is_echo
+    finally:
+        for task in pending:
+            task.cancel()
+    return result, False
+
+
+async def sweep(cidr: str, ports: Iterable[int] = DEFAULT_PORTS, timeout: float = 1.0,
+                retries: int = 1, max_age: float = 3600.0, max_concurrency: int = 1024,
+                cache_dir: str = SWEEP_CACHE_DIR) -> AsyncIterator[Dict]:
+    """
+    Recorre todas las direcciones de una subred y entrega cada resultado
+    en cuanto se conoce.
+
+    Las direcciones vivas comprobadas hace menos de `max_age` segundos se
+    entregan desde la caché (cached=True) sin sondearlas; el resto se
+    sondea con ping y conexiones TCP a `ports`. La concurrencia se adapta a
+    las pérdidas observadas (ver AdaptiveLimiter).
+
+    Args:
+        cidr: subred, p. ej. '192.168.1.0/24'
+        ports: puertos TCP a probar (conexión aceptada o rechazada = vivo)
+        timeout: espera por cada sondeo (segundos)
+        retries: ecos extra, junto con las conexiones TCP, si el primero
+            no responde
+        max_age: vigencia en segundos de un host vivo en la caché
+        max_concurrency: direcciones sondeadas a la vez como máximo
+
+    Yields:
+        dict con address, alive, rtt (ms), method ('icmp', 'tcp:<puerto>'
+        o 'tcp-rst:<puerto>'), checked (epoch) y cached
+
+    Raises:
+        ValueError si la subred no es válida o es mayor que /16
+    """
+    network = ipaddress.ip_network(cidr, strict=False)
+    if network.version != 4:
+        raise ValueError('Solo se admiten subredes IPv4')
+    if network.prefixlen < MIN_PREFIX:
+        raise ValueError(f'La subred es demasiado grande (máximo /{MIN_PREFIX})')
+    ports = tuple(ports)
+    cache = SweepCache(str(network), cache_dir)
+    now = time.time()
+
+    try:
+        pinger = icmp.Pinger()
+        pinger.open()
+    except icmp.ICMPUnavailableError:
+        pinger = None  # Solo TCP (sin permisos ICMP, o en Windows)
+    maximum = _tcp_limit(len(ports), max_concurrency)
+    limiter = AdaptiveLimiter(initial=min(64, maximum), minimum=min(8, maximum), maximum=maximum,
+                              cooldown=timeout)
+    results: asyncio.Queue = asyncio.Queue()
+    tasks = set()
+
+    async def probe(address):
+        try:
+            result, loss = await _probe(pinger, address, ports, timeout, retries)
+        except Exception:
+            result, loss = {'address': address, 'alive': False, 'rtt': None, 'method': None,
+                            'checked': time.time(), 'cached': False}, False
+        await limiter.release(loss)
+        results.put_nowait(result)
+
+    async def produce():
+        hosts = network.hosts() if network.num_addresses > 2 else iter(network)
+        for ip in hosts:
+            address = str(ip)
+            if cache.is_fresh(address, max_age, now):
+                results.put_nowait(dict(cache.hosts[address], address=address, cached=True))
+                continue
+            await limiter.acquire()
+            task = asyncio.ensure_future(probe(address))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.wait(set(tasks))
+        results.put_nowait(None)
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            result = await results.get()
+            if result is None:
+                break
+            if not result['cached']:
+                cache.update(result)
+            yield result
+        await producer
+    finally:
+        # Si se deja de iterar antes de terminar, se cancela lo pendiente
+        producer.cancel()
+        for task in list(tasks):
+            task.cancel()
+        if pinger is not None:
+            pinger.close()
+        cache.save()
+
+
+async def sweep_all(cidr: str, callback=None, **kwargs) -> List[Dict]:
+    """
+    Barrido completo; llama a callback(resultado) con cada dirección.
+
+    Returns:
+        Hosts vivos ordenados por dirección
+    """
+    alive = []
+    async for result in sweep(cidr, **kwargs):
+        if callback:
+            callback(result)
+        if result['alive']:
+            alive.append(result)
+    alive.sort(key=lambda result: ipaddress.ip_address(result['address']))
+    return alive
@@ -0,0 +1,296 @@
+# Motor de ping ICMP nativo sobre asyncio
+# Envía ecos ICMP desde un solo socket y empareja las respuestas por
+# identificador y secuencia, sin lanzar un proceso `ping` por destino.
+import asyncio
+import itertools
+import os
+import socket
+import struct
+import sys
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+
+# IP_RECVTTL no está en el módulo socket; este es su valor en Linux
+IP_RECVTTL = getattr(socket, 'IP_RECVTTL', 12)
+
+_ICMP_HEADER = struct.Struct('!BBHHH')  # type, code, checksum, id, seq
+_PAYLOAD = bytes(range(48))  # 56 bytes de datos, como `ping`, con la marca de tiempo
+
+RECEIVE_BUFFER = 4 * 1024 * 1024
+
+# Tiempos por defecto (segundos)
+DEFAULT_TIMEOUT = 1.0
+DEFAULT_INTERVAL = 0.2
+
+
+class ICMPUnavailableError(PermissionError):
+    """
+    No se puede hacer ping nativo: faltan privilegios para los sockets ICMP
+    o la plataforma no tiene lo que usa el motor (recvmsg y add_reader
+    del bucle de eventos, que no existen en Windows). Quien lo recibe debe
+    usar el comando `ping`.
+    """
+
+
+def checksum(data: bytes) -> int:
+    """Suma de verificación de Internet (RFC 1071)"""
+    if len(data) % 2:
+        data += b'\0'
+    total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def build_echo(ident: int, seq: int, payload: bytes = b'') -> bytes:
+    """Paquete ICMP echo request con su suma de verificación"""
+    header = _ICMP_HEADER.pack(ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    return _ICMP_HEADER.pack(ICMP_ECHO_REQUEST, 0, checksum(header + payload), ident, seq) + payload
+
+
+def open_socket() -> Tuple[socket.socket, bool]:
+    """
+    Abre un socket ICMP: primero el de ping sin privilegios (SOCK_DGRAM,
+    Linux con net.ipv4.ping_group_range) y si no, uno raw (root o
+    administrador).
+
+    Returns:
+        (socket, raw); raw indica si las respuestas traen la cabecera IP
+
+    Raises:
+        ICMPUnavailableError si el sistema no permite ninguno de los dos
+    """
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+        raw = False
+    except OSError:
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+            raw = True
+        except OSError as e:
+            raise ICMPUnavailableError(f'No se pueden abrir sockets ICMP: {e}') from e
+    sock.setblocking(False)
+    try:
+        # Con miles de ecos en vuelo las respuestas llegan en ráfagas
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER)
+    except OSError:
+        pass
+    if not raw:
+        try:
+            sock.setsockopt(socket.IPPROTO_IP, IP_RECVTTL, 1)
+        except OSError:
+            pass
+    return sock, raw
+
+
+def is_available() -> bool:
+    """Indica si este proceso puede hacer ping nativo"""
+    if not hasattr(socket.socket, 'recvmsg'):
+        return False
+    try:
+        sock, _ = open_socket()
+    except ICMPUnavailableError:
+        return False
+    sock.close()
+    return True
+
+
+def empty_result(target: str) -> Dict:
+    return {'target': target, 'address': None, 'sent': 0, 'received': 0, 'loss': 1.0,
+            'rtts': [], 'min': None, 'avg': None, 'max': None, 'ttl': None, 'error': None}
+
+
+class Pinger:
+    """
+    Ecos ICMP concurrentes sobre un socket no bloqueante.
+
+    Cada eco se registra con su destino y su número de secuencia; el
+    lector del socket, en el bucle de eventos, resuelve el futuro que le
+    corresponde. Así se pueden tener miles de ecos en vuelo a la vez.
+
+    Uso:
+        async with Pinger() as pinger:
+            result = await pinger.ping('192.168.1.1', count=4)
+            results = await pinger.ping_many(hosts, count=1)
+    """
+
+    def __init__(self, max_in_flight: int = 4096):
+        """
+        Args:
+            max_in_flight: ecos sin respuesta como máximo (uno por número
+                de secuencia disponible como mucho)
+        """
+        self.max_in_flight = min(max_in_flight, 0xFFFF)
+        self._sock = None
+        self._raw = False
+        self._ident = os.getpid() & 0xFFFF
+        self._seq = itertools.count()
+        self._pending: Dict[Tuple[str, int], Tuple[float, asyncio.Future]] = {}
+        self._slots = None
+        self._loop = None
+
+    async def __aenter__(self) -> 'Pinger':
+        self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+    def open(self):
+        """
+        Raises:
+            ICMPUnavailableError si no hay sockets ICMP o el bucle de
+            eventos no permite vigilarlos (ProactorEventLoop de Windows)
+        """
+        if not hasattr(socket.socket, 'recvmsg'):
+            raise ICMPUnavailableError('Esta plataforma no tiene socket.recvmsg')
+        self._loop = asyncio.get_running_loop()
+        self._sock, self._raw = open_socket()
+        try:
+            self._loop.add_reader(self._sock.fileno(), self._on_readable)
+        except NotImplementedError as e:
+            self._sock.close()
+            self._sock = None
+            raise ICMPUnavailableError('El bucle de eventos no admite add_reader') from e
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+
+    def close(self):
+        if self._sock is None:
+            return
+        self._loop.remove_reader(self._sock.fileno())
+        self._sock.close()
+        self._sock = None
+        for _, future in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending.clear()
+
+    def _on_readable(self):
+        """Lee todas las respuestas disponibles y resuelve sus futuros"""
+        while True:
+            try:
+                data, ancillary, _, source = self._sock.recvmsg(2048, 64)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                # Errores ICMP encolados en el socket: el eco vencerá solo
+                continue
+            received = time.perf_counter()
+            ttl = None
+            if self._raw:
+                # El socket raw entrega la cabecera IP y todo el ICMP del sistema
+                header_length = (data[0] & 0x0F) * 4
+                ttl = data[8]
+                data = data[header_length:]
+            else:
+                for level, kind, value in ancillary:
+                    if level == socket.IPPROTO_IP and kind == IP_RECVTTL:
+                        ttl = int.from_bytes(value[:4], sys.byteorder)
+            if len(data) < _ICMP_HEADER.size:
+                continue
+            icmp_type, _, _, ident, seq = _ICMP_HEADER.unpack_from(data)
+            if icmp_type != ICMP_ECHO_REPLY:
+                continue
+            # En SOCK_DGRAM el kernel pone su propio id y filtra por él
+            if self._raw and ident != self._ident:
+                continue
+            entry = self._pending.pop((source[0], seq), None)
+            if entry is None:
+                continue
+            sent, future = entry
+            if not future.done():
+                future.set_result(((received - sent) * 1000, ttl))
+
+    async def echo(self, address: str, timeout: float = DEFAULT_TIMEOUT) -> Optional[Tuple[float, Optional[int]]]:
+        """
+        Envía un eco a una dirección IPv4 y espera la respuesta.
+
+        Returns:
+            (rtt en ms, ttl) o None si no hubo respuesta a tiempo
+        """
+        async with self._slots:
+            seq = next(self._seq) & 0xFFFF
+            key = (address, seq)
+            future = self._loop.create_future()
+            packet = build_echo(self._ident, seq, struct.pack('!d', time.time()) + _PAYLOAD)
+            self._pending[key] = (time.perf_counter(), future)
+            try:
+                await self._loop.sock_sendto(self._sock, packet, (address, 0))
+                return await asyncio.wait_for(future, timeout)
+            except (asyncio.TimeoutError, OSError):
+                return None
+            finally:
+                self._pending.pop(key, None)
+
+    async def ping(self, target: str, count: int = 4, timeout: float = DEFAULT_TIMEOUT,
+                   interval: float = DEFAULT_INTERVAL) -> Dict:
+        """
+        Hace ping a un destino (IPv4 o nombre).
+
+        Args:
+            target: dirección o nombre del destino
+            count: ecos a enviar
+            timeout: espera máxima por cada respuesta (segundos)
+            interval: separación entre envíos (segundos)
+
+        Returns:
+            dict con target, address, sent, received, loss (0 a 1), rtts
+            (ms), min, avg, max (ms, None sin respuestas), ttl (de la última
+            respuesta) y error (mensaje si no se pudo resolver o enviar)
+        """
+        result = empty_result(target)
+        try:
+            infos = await self._loop.getaddrinfo(target, None, family=socket.AF_INET, type=socket.SOCK_RAW)
+            result['address'] = address = infos[0][4][0]
+        except (OSError, IndexError, UnicodeError) as e:
+            result['error'] = f'No se pudo resolver {target}: {e}'
+            return result
+
+        echoes = []
+        for index in range(count):
+            if index:
+                await asyncio.sleep(interval)
+            echoes.append(asyncio.ensure_future(self.echo(address, timeout)))
+        replies = [reply for reply in await asyncio.gather(*echoes) if reply is not None]
+
+        result['sent'] = count
+        result['received'] = len(replies)
+        result['loss'] = 1 - len(replies) / count if count else 1.0
+        rtts = result['rtts'] = [round(rtt, 3) for rtt, _ in replies]
+        if rtts:
+            result['min'] = min(rtts)
+            result['avg'] = round(sum(rtts) / len(rtts), 3)
+            result['max'] = max(rtts)
+            result['ttl'] = replies[-1][1]
+        return result
+
+    async def ping_many(self, targets: Iterable[str], count: int = 1, timeout: float = DEFAULT_TIMEOUT,
+                        interval: float = DEFAULT_INTERVAL) -> List[Dict]:
+        """Hace ping a todos los destinos a la vez; resultados en el mismo orden"""
+        return await asyncio.gather(*(self.ping(target, count, timeout, interval) for target in targets))
+
+
+async def ping_many(targets: Iterable[str], count: int = 1, timeout: float = DEFAULT_TIMEOUT,
+                    interval: float = DEFAULT_INTERVAL) -> List[Dict]:
+    """Atajo: abre un Pinger, hace ping a todos los destinos y lo cierra"""
+    async with Pinger() as pinger:
+        return await pinger.ping_many(targets, count, timeout, interval)
+
+
+def format_result(result: Dict) -> str:
+    """Resumen legible de un resultado, al estilo de `ping`"""
+    if result['error']:
+        return result['error']
+    lines = [f"PING {result['target']} ({result['address']})"]
+    ttl = f" ttl={result['ttl']}" if result['ttl'] is not None else ''
+    for rtt in result['rtts']:
+        lines.append(f"Respuesta de {result['address']}:{ttl} tiempo={rtt:.2f} ms")
+    lines.append('')
+    lines.append(f"{result['sent']} enviados, {result['received']} recibidos, "
+                 f"{result['loss'] * 100:.0f}% perdidos")
+    if result['rtts']:
+        lines.append(f"rtt mín/prom/máx = {result['min']:.2f}/{result['avg']:.2f}/{result['max']:.2f} ms")
+    return '\n'.join(lines)
@@ -0,0 +1,146 @@
+# Estadísticas acumuladas por tipo de evento y por hora
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .log_storage import FileLock
+
+HOUR = 3600
+
+
+def hour_bucket(ts: float) -> int:
+    """Inicio (epoch) de la hora que contiene `ts`"""
+    return int(ts // HOUR) * HOUR
+
+
+class RollupStore:
+    """
+    Contadores de éxitos y fallos por (tipo, hora), persistidos en JSON.
+
+    Se actualizan en memoria con cada evento y se guardan cada
+    `flush_interval` segundos. Al guardar se suman al archivo solo los
+    incrementos propios desde el último guardado (con bloqueo exclusivo),
+    así que varios procesos pueden compartir el mismo archivo sin pisarse.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 30.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(path + '.lock')
+        self._counters: Dict[Tuple[str, int], List[int]] = {}
+        self._delta: Dict[Tuple[str, int], List[int]] = {}
+        self._last_save = time.monotonic()
+        self._counters = self._read()
+
+    def _read(self) -> Dict[Tuple[str, int], List[int]]:
+        counters = {}
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                for event_type, hours in data.get('rollups', {}).items():
+                    for hour, (ok, failed) in hours.items():
+                        counters[(event_type, int(hour))] = [ok, failed]
+        except Exception as e:
+            print(f"Error al cargar estadísticas de logs: {str(e)}")
+        return counters
+
+    def _write(self, counters: Dict[Tuple[str, int], List[int]]):
+        data: Dict[str, Dict[str, List[int]]] = {}
+        for (event_type, hour), value in sorted(counters.items()):
+            data.setdefault(event_type, {})[str(hour)] = value
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'rollups': data}, f)
+        os.replace(tmp_path, self.path)
+
+    def add(self, event_type: str, ts: float, success: bool, count: int = 1):
+        """Suma `count` eventos a la hora de `ts`"""
+        key = (event_type, hour_bucket(ts))
+        column = 0 if success else 1
+        with self._lock:
+            for counters in (self._counters, self._delta):
+                value = counters.get(key)
+                if value is None:
+                    value = counters[key] = [0, 0]
+                value[column] += count
+
+    def save_if_due(self):
+        if time.monotonic() - self._last_save >= self.flush_interval:
+            self.save()
+
+    def save(self):
+        """Suma los incrementos pendientes al archivo y recarga el total"""
+        with self._lock:
+            delta, self._delta = self._delta, {}
+        self._last_save = time.monotonic()
+        if not delta:
+            return
+        try:
+            with self._file_lock.exclusive():
+                merged = self._read()
+                for key, (ok, failed) in delta.items():
+                    value = merged.setdefault(key, [0, 0])
+                    value[0] += ok
+                    value[1] += failed
+                self._write(merged)
+            with self._lock:
+                # Lo que llegó mientras se guardaba sigue en el nuevo delta
+                for key, (ok, failed) in self._delta.items():
+                    value = merged.setdefault(key, [0, 0])
+                    value[0] += ok
+                    value[1] += failed
+                self._counters = merged
+        except Exception as e:
+            print(f"Error al guardar estadísticas de logs: {str(e)}")
+            with self._lock:
+                for key, (ok, failed) in delta.items():
+                    value = self._delta.setdefault(key, [0, 0])
+                    value[0] += ok
+                    value[1] += failed
+
+    def rebuild(self, entries: Iterable):
+        """
+        Recalcula todos los contadores en una sola pasada sobre `entries`
+        (objetos con ts, type, success y count) y reemplaza el archivo.
+        """
+        counters: Dict[Tuple[str, int], List[int]] = {}
+        for entry in entries:
+            key = (entry.type, hour_bucket(entry.ts))
+            value = counters.get(key)
+            if value is None:
+                value = counters[key] = [0, 0]
+            value[0 if entry.success else 1] += entry.count
+        with self._file_lock.exclusive():
+            self._write(counters)
+        with self._lock:
+            self._counters = counters
+            self._delta = {}
+
+    def query(self, event_type: Optional[str] = None, start: Optional[float] = None,
+              end: Optional[float] = None) -> List[dict]:
+        """Filas {'hour', 'type', 'success', 'failure'} ordenadas por hora"""
+        first = hour_bucket(start) if start is not None else None
+        with self._lock:
+            items = [
+                (hour, key_type, ok, failed)
+                for (key_type, hour), (ok, failed) in self._counters.items()
+                if (event_type is None or key_type == event_type)
+                and (first is None or hour >= first)
+                and (end is None or hour <= end)
+            ]
+        items.sort()
+        return [
+            {'hour': datetime.fromtimestamp(hour).isoformat(), 'type': key_type,
+             'success': ok, 'failure': failed}
+            for hour, key_type, ok, failed in items
+        ]
+
+    def close(self):
+        self.save()
+        self._file_lock.close()
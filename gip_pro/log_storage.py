@@ -0,0 +1,725 @@
+# Almacenamiento en disco de los eventos del logger (JSON Lines o SQLite)
+import abc
+import collections
+import contextlib
+import glob
+import gzip
+import json
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from typing import Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+try:
+    from select import PIPE_BUF
+except ImportError:
+    PIPE_BUF = 4096
+
+# Fila neutral que intercambian el logger y los backends:
+# (ts, tipo, detalles, éxito, repeticiones, ts de la última repetición,
+#  nivel, campos estructurados)
+Row = Tuple[float, str, str, bool, int, float, str, Optional[dict]]
+
+
+# Antigüedad a partir de la cual un temporal se da por abandonado cuando no
+# se puede consultar si su proceso sigue vivo (Windows)
+STALE_TMP_AGE = 3600
+
+
+def _process_alive(pid: int, path: Optional[str] = None) -> bool:
+    """Si el proceso `pid` sigue corriendo (en Windows, si `path` es reciente)"""
+    if pid == os.getpid():
+        return True
+    if os.name == 'nt':
+        # os.kill(pid, 0) termina el proceso en Windows: se usa la antigüedad
+        try:
+            return path is not None and time.time() - os.path.getmtime(path) < STALE_TMP_AGE
+        except OSError:
+            return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Existe, pero es de otro usuario
+    except OSError:
+        return False
+    return True
+
+
+def dumps(value) -> str:
+    """JSON de una entrada; los campos no serializables (datetime, IPv4Address...) van como texto"""
+    return json.dumps(value, default=str)
+
+
+def tail_offset(f, count: int, block_size: int = 64 * 1024) -> int:
+    """
+    Devuelve el offset (en bytes) donde empiezan las últimas `count` líneas.
+
+    Lee el archivo binario `f` hacia atrás por bloques desde el final, así
+    que el costo depende de cuántas líneas se piden y no del tamaño total.
+    """
+    f.seek(0, os.SEEK_END)
+    end = f.tell()
+    if count <= 0:
+        return end
+    if end == 0:
+        return 0
+    f.seek(end - 1)
+    # El salto de línea final no separa ninguna línea adicional
+    pos = end - 1 if f.read(1) == b'\n' else end
+    found = 0
+    while pos > 0:
+        read_size = min(block_size, pos)
+        pos -= read_size
+        f.seek(pos)
+        block = f.read(read_size)
+        index = len(block)
+        while True:
+            index = block.rfind(b'\n', 0, index)
+            if index < 0:
+                break
+            found += 1
+            if found == count:
+                return pos + index + 1
+    return 0
+
+
+def row_from_dict(data: dict) -> Row:
+    """Convierte un evento serializado (formato de logs.txt) en una fila"""
+    ts = datetime.fromisoformat(data['timestamp']).timestamp()
+    last_seen = data.get('last_seen')
+    last_ts = datetime.fromisoformat(last_seen).timestamp() if last_seen else ts
+    return (ts, data.get('type', ''), data.get('details', ''), bool(data.get('success', True)),
+            data.get('count', 1), last_ts, data.get('level', 'info'), data.get('fields'))
+
+
+def _row_matches(row: Row, event_type, start, end, success) -> bool:
+    return ((event_type is None or row[1] == event_type)
+            and (success is None or row[3] == success)
+            and (start is None or row[0] >= start)
+            and (end is None or row[0] <= end))
+
+
+class FileLock:
+    """
+    Bloqueo consultivo (flock) entre procesos sobre un archivo auxiliar.
+
+    Los escritores toman el bloqueo compartido mientras agregan líneas; la
+    compactación, la rotación y las reescrituras toman el exclusivo. En
+    sistemas sin fcntl (Windows) no bloquea nada.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    def _acquire(self, operation: int):
+        if fcntl is None:
+            return
+        if self._fd is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._fd, operation)
+
+    def _release(self):
+        if fcntl is not None and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    @contextlib.contextmanager
+    def shared(self):
+        self._acquire(fcntl.LOCK_SH if fcntl else 0)
+        try:
+            yield
+        finally:
+            self._release()
+
+    @contextlib.contextmanager
+    def exclusive(self):
+        self._acquire(fcntl.LOCK_EX if fcntl else 0)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class LogStorage(abc.ABC):
+    """
+    Interfaz de los backends de almacenamiento del logger.
+
+    Las escrituras (write_batch, rewrite, clear) se llaman solo desde el hilo
+    escritor del logger; las lecturas pueden llamarse desde cualquier hilo.
+    Las entradas que se escriben exponen ts, type, details, success, count,
+    last_ts, level, fields y to_dict(); las lecturas devuelven filas (ver Row).
+    Un backend que no implemente los métodos abstractos falla al crearse.
+    """
+
+    @abc.abstractmethod
+    def load_tail(self, count: int) -> List[Row]:
+        """Últimas `count` entradas, de la más antigua a la más reciente"""
+
+    @abc.abstractmethod
+    def write_batch(self, entries: list):
+        """Agrega un lote de entradas al final del almacenamiento"""
+
+    @abc.abstractmethod
+    def rewrite(self, entries: list):
+        """Reemplaza todo el contenido actual por las entradas dadas"""
+
+    @abc.abstractmethod
+    def iter_rows(self) -> Iterator[Row]:
+        """Recorre todo el historial, del evento más antiguo al más reciente"""
+
+    def query_rows(self, event_type: Optional[str] = None, start: Optional[float] = None,
+                   end: Optional[float] = None, success: Optional[bool] = None,
+                   limit: Optional[int] = None) -> List[Row]:
+        """Filtra todo el historial; con `limit` conserva las N coincidencias más recientes"""
+        rows = (row for row in self.iter_rows() if _row_matches(row, event_type, start, end, success))
+        if limit:
+            return list(collections.deque(rows, maxlen=limit))
+        return list(rows)
+
+    @abc.abstractmethod
+    def clear(self):
+        """Elimina todo el historial"""
+
+    def close(self):
+        pass
+
+
+class JsonLinesStorage(LogStorage):
+    """
+    Historial en logs.txt, una línea JSON por entrada.
+
+    Con rotación activada el archivo se archiva como logs.N.txt al superar
+    `rotate_max_bytes` o al cambiar de día, y un hilo aparte lo comprime a
+    logs.N.txt.gz y aplica la retención. Sin rotación, el archivo se compacta
+    a las últimas `max_entries` líneas cuando supera el umbral.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100, compact_threshold_bytes: int = 1024 * 1024,
+                 rotate_max_bytes: int = 0, rotate_daily: bool = False,
+                 retention_segments: int = 0, retention_days: int = 0):
+        self.path = path
+        self.max_entries = max_entries
+        self.compact_threshold_bytes = compact_threshold_bytes
+        self.rotate_max_bytes = rotate_max_bytes
+        self.rotate_daily = rotate_daily
+        self.retention_segments = retention_segments
+        self.retention_days = retention_days
+        self._archive_lock = threading.Lock()
+        self._lock = FileLock(path + '.lock')
+        self._fd: Optional[int] = None  # Descriptor O_APPEND de logs.txt
+        self._compacted_size = 0  # Tamaño del archivo tras la última compactación
+        self._segment_day: Optional[date] = None  # Día de la primera entrada del segmento actual
+        self._resume_archiving()
+
+    @property
+    def rotation_enabled(self) -> bool:
+        return self.rotate_max_bytes > 0 or bool(self.rotate_daily)
+
+    def load_tail(self, count: int) -> List[Row]:
+        """
+        Solo se leen y decodifican las últimas `count` líneas: el archivo se
+        recorre hacia atrás desde el final, así que el costo no depende del
+        tamaño del historial. Si logs.txt tiene menos (recién rotado), se
+        completan con los segmentos archivados, del más reciente hacia atrás.
+        """
+        rows = []
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                self._segment_day = self._read_segment_day(f)
+                f.seek(tail_offset(f, count))
+                rows = self._decode_lines(f)
+                self._compacted_size = f.tell()
+        for _, path in reversed(self.archived_segments()):
+            if len(rows) >= count:
+                break
+            rows = self._segment_tail(path, count - len(rows)) + rows
+        return rows
+
+    @staticmethod
+    def _decode_lines(lines) -> List[Row]:
+        rows = []
+        for line in lines:
+            try:
+                rows.append(row_from_dict(json.loads(line)))
+            except Exception:
+                continue
+        return rows
+
+    def _segment_tail(self, path: str, count: int) -> List[Row]:
+        """Últimas `count` filas de un segmento archivado (comprimido o no)"""
+        try:
+            if path.endswith('.gz'):
+                # gzip no se puede leer hacia atrás: se recorre guardando la cola
+                with gzip.open(path, 'rb') as f:
+                    return self._decode_lines(collections.deque(f, maxlen=count))
+            with open(path, 'rb') as f:
+                f.seek(tail_offset(f, count))
+                return self._decode_lines(f)
+        except FileNotFoundError:
+            # El hilo de archivo lo acaba de comprimir
+            if not path.endswith('.gz'):
+                return self._segment_tail(path + '.gz', count)
+            return []
+        except (OSError, EOFError):
+            return []
+
+    def write_batch(self, entries: list):
+        """
+        Agrega el lote con escrituras O_APPEND de hasta PIPE_BUF bytes.
+
+        Cada write() lleva solo líneas completas, así que varios procesos
+        pueden escribir el mismo logs.txt sin intercalar ni perder líneas.
+        Si alguna línea supera PIPE_BUF, el lote se escribe con el bloqueo
+        exclusivo en lugar del compartido.
+        """
+        if self.rotation_enabled:
+            self._rotate_if_needed(entries[0])
+        lines = [(dumps(entry.to_dict()) + '\n').encode('utf-8') for entry in entries]
+        oversized = any(len(line) > PIPE_BUF for line in lines)
+        with (self._lock.exclusive() if oversized else self._lock.shared()):
+            fd = self._ensure_fd()
+            if self._segment_day is None:
+                self._segment_day = date.fromtimestamp(entries[0].ts)
+            chunk = b''
+            for line in lines:
+                if chunk and len(chunk) + len(line) > PIPE_BUF:
+                    self._write_all(fd, chunk)
+                    chunk = b''
+                chunk += line
+            if chunk:
+                self._write_all(fd, chunk)
+            size = os.fstat(fd).st_size
+        # El umbral crece con el tamaño compactado para que, con
+        # max_entries alto, la compactación siga siendo O(1) amortizada
+        if (not self.rotation_enabled
+                and self.compact_threshold_bytes > 0
+                and size > max(self.compact_threshold_bytes, 2 * self._compacted_size)):
+            self.compact()
+
+    @staticmethod
+    def _write_all(fd: int, data: bytes):
+        while data:
+            written = os.write(fd, data)
+            data = data[written:]
+
+    def _ensure_fd(self) -> int:
+        """
+        Devuelve el descriptor O_APPEND de logs.txt (con el bloqueo tomado).
+
+        Si otro proceso rotó o compactó el archivo, el descriptor apunta a
+        un inodo que ya no es logs.txt y se vuelve a abrir.
+        """
+        if self._fd is not None:
+            try:
+                if os.fstat(self._fd).st_ino == os.stat(self.path).st_ino:
+                    return self._fd
+            except OSError:
+                pass
+            self._close_file()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, 'O_BINARY', 0)
+        self._fd = os.open(self.path, flags, 0o644)
+        with open(self.path, 'rb') as f:
+            self._segment_day = self._read_segment_day(f)
+        return self._fd
+
+    def rewrite(self, entries: list):
+        with self._lock.exclusive():
+            self._rewrite_locked(entries)
+
+    def _rewrite_locked(self, entries: list):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        self._close_file()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(dumps(entry.to_dict()) + '\n')
+            self._compacted_size = f.tell()
+        os.replace(tmp_path, self.path)
+        self._segment_day = date.fromtimestamp(entries[0].ts) if entries else None
+
+    def clear(self):
+        """Vacía logs.txt y elimina los segmentos archivados"""
+        with self._lock.exclusive():
+            self._rewrite_locked([])
+            with self._archive_lock:
+                for _, path in self.archived_segments():
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+
+    def close(self):
+        self._close_file()
+        self._lock.close()
+
+    def _close_file(self):
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            finally:
+                self._fd = None
+
+    def compact(self):
+        """
+        Compacta logs.txt dejando solo las últimas max_entries líneas.
+
+        Solo se usa con la rotación desactivada; con rotación el historial
+        completo se conserva en los segmentos archivados. Busca el inicio de
+        las últimas líneas hacia atrás y copia desde ahí, sin recorrer el
+        resto del archivo. Toma el bloqueo exclusivo, así que ningún proceso
+        agrega líneas mientras tanto.
+        """
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with self._lock.exclusive():
+                self._close_file()
+                if not os.path.exists(self.path):
+                    return
+                with open(self.path, 'rb') as src:
+                    src.seek(tail_offset(src, self.max_entries))
+                    with open(tmp_path, 'wb') as dst:
+                        shutil.copyfileobj(src, dst)
+                        compacted_size = dst.tell()
+                os.replace(tmp_path, self.path)
+                self._compacted_size = compacted_size
+        except Exception:
+            try:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            except Exception:
+                pass
+
+    @staticmethod
+    def _read_segment_day(f) -> Optional[date]:
+        """Día de la primera entrada de un segmento abierto en binario"""
+        try:
+            f.seek(0)
+            first = f.readline()
+            if first:
+                return datetime.fromisoformat(json.loads(first)['timestamp']).date()
+        except Exception:
+            pass
+        return None
+
+    def _needs_rotation(self, next_ts: float) -> bool:
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return False
+        if size == 0:
+            return False
+        by_size = self.rotate_max_bytes > 0 and size >= self.rotate_max_bytes
+        by_day = (self.rotate_daily and self._segment_day is not None
+                  and date.fromtimestamp(next_ts) != self._segment_day)
+        return by_size or by_day
+
+    def _rotate_if_needed(self, next_entry):
+        """Archiva logs.txt si superó el tamaño o si cambió el día"""
+        if self._needs_rotation(next_entry.ts):
+            self.rotate(next_entry.ts)
+
+    def _segment_path(self, index: int) -> str:
+        base, ext = os.path.splitext(self.path)
+        return f"{base}.{index}{ext}"
+
+    def archived_segments(self) -> List[tuple]:
+        """Lista (índice, ruta) de los segmentos archivados, del más antiguo al más reciente"""
+        base, ext = os.path.splitext(self.path)
+        pattern = re.compile(re.escape(os.path.basename(base)) + r'\.(\d+)' + re.escape(ext) + r'(\.gz)?$')
+        segments = {}
+        for path in glob.glob(f"{glob.escape(base)}.*{ext}*"):
+            match = pattern.match(os.path.basename(path))
+            if not match:
+                continue
+            index = int(match.group(1))
+            # Mientras se comprime pueden coexistir ambos; el .txt está completo
+            if index not in segments or not match.group(2):
+                segments[index] = path
+        return sorted(segments.items())
+
+    def rotate(self, next_ts: Optional[float] = None):
+        """
+        Cierra el segmento actual y lo archiva como logs.N.txt.
+
+        Se hace con el bloqueo exclusivo; si se indica `next_ts`, la
+        condición se vuelve a comprobar ya bloqueado por si otro proceso
+        rotó primero. La compresión a logs.N.txt.gz y la política de
+        retención corren en un hilo aparte para no retrasar la escritura de
+        los siguientes lotes.
+        """
+        with self._lock.exclusive():
+            self._close_file()
+            if next_ts is not None:
+                self._segment_day = self._current_segment_day()
+                if not self._needs_rotation(next_ts):
+                    return
+            if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+                return
+            segments = self.archived_segments()
+            index = segments[-1][0] + 1 if segments else 1
+            archived = self._segment_path(index)
+            os.replace(self.path, archived)
+            self._compacted_size = 0
+            self._segment_day = None
+        threading.Thread(target=self._archive_segment, args=(archived,), daemon=True).start()
+
+    def _current_segment_day(self) -> Optional[date]:
+        try:
+            with open(self.path, 'rb') as f:
+                return self._read_segment_day(f)
+        except OSError:
+            return None
+
+    def _resume_archiving(self):
+        """
+        Comprime los segmentos que quedaron sin comprimir en una ejecución
+        anterior y borra los .gz temporales de compresiones interrumpidas
+        (el hilo de archivo es daemon y muere con el intérprete).
+        """
+        self._remove_stale_archives()
+        pending = [path for _, path in self.archived_segments() if not path.endswith('.gz')]
+        if pending:
+            threading.Thread(target=lambda: [self._archive_segment(p) for p in pending], daemon=True).start()
+
+    def _remove_stale_archives(self):
+        """Borra los logs.N.txt.gz.<pid>.tmp de procesos que ya no existen"""
+        base, ext = os.path.splitext(self.path)
+        pattern = re.compile(re.escape(os.path.basename(base)) + r'\.\d+' + re.escape(ext) + r'\.gz\.(\d+)\.tmp$')
+        for path in glob.glob(f"{glob.escape(base)}.*{ext}.gz.*.tmp"):
+            match = pattern.match(os.path.basename(path))
+            if not match or _process_alive(int(match.group(1)), path):
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _archive_segment(self, path: str):
+        """Comprime un segmento rotado y aplica la retención (hilo de archivo)"""
+        with self._archive_lock:
+            try:
+                gz_path = path + '.gz'
+                # Otro proceso puede estar comprimiendo el mismo segmento
+                tmp_path = f"{gz_path}.{os.getpid()}.tmp"
+                with open(path, 'rb') as src, gzip.open(tmp_path, 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+                shutil.copystat(path, tmp_path)
+                os.replace(tmp_path, gz_path)
+                os.remove(path)
+            except Exception:
+                try:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                except Exception:
+                    pass
+            self.apply_retention()
+
+    def apply_retention(self):
+        """Elimina los segmentos archivados que exceden la política de retención"""
+        segments = self.archived_segments()
+        expired = []
+        if self.retention_segments > 0 and len(segments) > self.retention_segments:
+            expired = segments[:len(segments) - self.retention_segments]
+        if self.retention_days > 0:
+            cutoff = time.time() - self.retention_days * 86400
+            for segment in segments:
+                try:
+                    if os.path.getmtime(segment[1]) < cutoff and segment not in expired:
+                        expired.append(segment)
+                except OSError:
+                    continue
+        for _, path in expired:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def iter_rows(self) -> Iterator[Row]:
+        """
+        Lee los segmentos archivados (comprimidos o no) y luego logs.txt como
+        un flujo, sin cargarlos en memoria.
+        """
+        paths = [path for _, path in self.archived_segments()] + [self.path]
+        for path in paths:
+            try:
+                opener = gzip.open if path.endswith('.gz') else open
+                with opener(path, 'rb') as f:
+                    for line in f:
+                        try:
+                            yield row_from_dict(json.loads(line))
+                        except Exception:
+                            continue
+            except OSError:
+                continue
+
+
+class SqliteStorage(LogStorage):
+    """
+    Historial en una base SQLite en modo WAL.
+
+    El hilo escritor inserta cada lote dentro de una sola transacción con
+    una sentencia preparada; las lecturas abren su propia conexión, así que
+    la interfaz o un proceso externo de reportes pueden consultar la base
+    mientras la aplicación escribe.
+    """
+
+    _INSERT = ('INSERT INTO events (ts, type, details, success, count, last_ts, level, fields) '
+               'VALUES (?, ?, ?, ?, ?, ?, ?, ?)')
+    _COLUMNS = 'ts, type, details, success, count, last_ts, level, fields'
+
+    def __init__(self, path: str, retention_days: int = 0):
+        self.path = path
+        self.retention_days = retention_days
+        self._conn: Optional[sqlite3.Connection] = None  # Conexión del hilo escritor
+        self._last_retention = 0.0
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS events (
+                    id INTEGER PRIMARY KEY,
+                    ts REAL NOT NULL,
+                    type TEXT NOT NULL,
+                    details TEXT,
+                    success INTEGER NOT NULL,
+                    count INTEGER NOT NULL DEFAULT 1,
+                    last_ts REAL NOT NULL,
+                    level TEXT NOT NULL DEFAULT 'info',
+                    fields TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_events_ts ON events (ts);
+                CREATE INDEX IF NOT EXISTS idx_events_type_ts ON events (type, ts);
+            ''')
+            # Bases creadas antes de que existieran los campos estructurados
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(events)')}
+            with conn:
+                if 'level' not in columns:
+                    conn.execute("ALTER TABLE events ADD COLUMN level TEXT NOT NULL DEFAULT 'info'")
+                if 'fields' not in columns:
+                    conn.execute('ALTER TABLE events ADD COLUMN fields TEXT')
+        finally:
+            conn.close()
+
+    def _connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=check_same_thread)
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _writer_conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            # La usa solo el hilo escritor, pero se cierra desde close()
+            self._conn = self._connect(check_same_thread=False)
+        return self._conn
+
+    @staticmethod
+    def _to_row(row) -> Row:
+        return (row[0], row[1], row[2], bool(row[3]), row[4], row[5], row[6],
+                json.loads(row[7]) if row[7] else None)
+
+    @staticmethod
+    def _to_params(entries: list) -> list:
+        return [
+            (e.ts, e.type, e.details, int(e.success), e.count, e.last_ts, e.level,
+             dumps(e.fields) if e.fields else None)
+            for e in entries
+        ]
+
+    def load_tail(self, count: int) -> List[Row]:
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                f'SELECT {self._COLUMNS} FROM events ORDER BY id DESC LIMIT ?', (count,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [self._to_row(row) for row in reversed(rows)]
+
+    def write_batch(self, entries: list):
+        conn = self._writer_conn()
+        with conn:
+            conn.executemany(self._INSERT, self._to_params(entries))
+        self._apply_retention(conn)
+
+    def _apply_retention(self, conn: sqlite3.Connection):
+        """Borra eventos más antiguos que retention_days (como máximo una vez por hora)"""
+        now = time.time()
+        if self.retention_days <= 0 or now - self._last_retention < 3600:
+            return
+        self._last_retention = now
+        with conn:
+            conn.execute('DELETE FROM events WHERE ts < ?', (now - self.retention_days * 86400,))
+
+    def rewrite(self, entries: list):
+        conn = self._writer_conn()
+        with conn:
+            conn.execute('DELETE FROM events')
+            conn.executemany(self._INSERT, self._to_params(entries))
+
+    def clear(self):
+        self.rewrite([])
+
+    def iter_rows(self) -> Iterator[Row]:
+        conn = self._connect()
+        try:
+            for row in conn.execute(f'SELECT {self._COLUMNS} FROM events ORDER BY id'):
+                yield self._to_row(row)
+        finally:
+            conn.close()
+
+    def query_rows(self, event_type: Optional[str] = None, start: Optional[float] = None,
+                   end: Optional[float] = None, success: Optional[bool] = None,
+                   limit: Optional[int] = None) -> List[Row]:
+        """Resuelve el filtro en SQL usando los índices de tipo y marca de tiempo"""
+        clauses, params = [], []
+        if event_type is not None:
+            clauses.append('type = ?')
+            params.append(event_type)
+        if start is not None:
+            clauses.append('ts >= ?')
+            params.append(start)
+        if end is not None:
+            clauses.append('ts <= ?')
+            params.append(end)
+        if success is not None:
+            clauses.append('success = ?')
+            params.append(int(success))
+        sql = f'SELECT {self._COLUMNS} FROM events'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        if limit:
+            sql += ' ORDER BY ts DESC, id DESC LIMIT ?'
+            params.append(limit)
+        else:
+            sql += ' ORDER BY ts, id'
+        conn = self._connect()
+        try:
+            rows = [self._to_row(row) for row in conn.execute(sql, params)]
+        finally:
+            conn.close()
+        return rows[::-1] if limit else rows
+
+    def close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            finally:
+                self._conn = None
@@ -1,88 +1,814 @@
 # Registro de eventos, historial o errores
+import atexit
+import bisect
+import heapq
 import os
+import queue
+import sys
+import threading
+import time
+from collections.abc import Sequence
 from datetime import datetime
-from typing import List, Optional
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
 import json
 
+from .log_rollups import RollupStore
+from .log_storage import JsonLinesStorage, LogStorage, SqliteStorage, row_from_dict
+
 LOG_PATH = os.path.join(os.path.dirname(__file__), 'data', 'logs.txt')
 LOG_CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'data', 'log_config.json')
 
-class NetworkLogger:
+# Niveles de severidad, de menor a mayor
+LEVELS = {'debug': 10, 'info': 20, 'warning': 30, 'error': 40}
+
+
+class LogEntry:
+    """
+    Evento registrado en memoria.
+
+    Usa __slots__ y guarda la marca de tiempo como float para que un millón
+    de entradas ocupe una fracción de lo que ocuparían los dict equivalentes.
+    Admite acceso tipo dict (entry['type'], entry.get('details')) para no
+    romper a quien consumía los dict anteriores.
+
+    Una entrada puede representar una racha de eventos idénticos
+    consecutivos: `count` indica cuántos son, `ts` es el primero y
+    `last_ts` el último. `level` es la severidad y `fields` los campos
+    estructurados del evento (o None).
+    """
+    __slots__ = ('ts', 'type', 'details', 'success', 'count', 'last_ts', 'level', 'fields')
+
+    _KEYS = ('timestamp', 'type', 'details', 'success', 'count', 'first_seen', 'last_seen',
+             'level', 'fields')
+
+    def __init__(self, ts: float, event_type: str, details: str, success: bool = True,
+                 count: int = 1, last_ts: Optional[float] = None,
+                 level: str = 'info', fields: Optional[dict] = None):
+        self.ts = ts
+        self.type = sys.intern(event_type)
+        self.details = sys.intern(details) if isinstance(details, str) else details
+        self.success = bool(success)
+        self.count = count
+        self.last_ts = ts if last_ts is None else last_ts
+        self.level = sys.intern(level)
+        self.fields = fields or None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'LogEntry':
+        return cls(*row_from_dict(data))
+
+    @property
+    def timestamp(self) -> str:
+        return datetime.fromtimestamp(self.ts).isoformat()
+
+    @property
+    def first_seen(self) -> str:
+        return self.timestamp
+
+    @property
+    def last_seen(self) -> str:
+        return datetime.fromtimestamp(self.last_ts).isoformat()
+
+    def copy(self) -> 'LogEntry':
+        return LogEntry(self.ts, self.type, self.details, self.success, self.count, self.last_ts,
+                        self.level, self.fields)
+
+    def same_event(self, other: 'LogEntry') -> bool:
+        """Indica si ambas entradas registran el mismo evento (tipo, detalles, éxito, nivel y campos)"""
+        return (self.type == other.type and self.details == other.details
+                and self.success == other.success and self.level == other.level
+                and self.fields == other.fields)
+
+    def fold(self, other: 'LogEntry'):
+        """Acumula en esta entrada la racha de `other`, posterior a ella"""
+        self.count += other.count
+        self.last_ts = other.last_ts
+
+    def to_dict(self) -> dict:
+        data = {
+            'timestamp': self.timestamp,
+            'type': self.type,
+            'details': self.details,
+            'success': self.success
+        }
+        if self.level != 'info':
+            data['level'] = self.level
+        if self.fields:
+            data['fields'] = self.fields
+        if self.count > 1:
+            data['count'] = self.count
+            data['first_seen'] = self.first_seen
+            data['last_seen'] = self.last_seen
+        return data
+
+    def __getitem__(self, key: str):
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __repr__(self):
+        return f"LogEntry({self.to_dict()!r})"
+
+
+class RingBuffer:
+    """
+    Buffer circular acotado con inserción y expulsión O(1).
+
+    La lista interna crece hasta la capacidad y a partir de ahí se
+    sobrescribe en círculo, así que una capacidad alta no reserva memoria
+    por adelantado. Cada elemento tiene un número de secuencia absoluto
+    (contando todo lo insertado), lo que permite vistas estables sobre
+    las entradas recientes.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, int(capacity))
+        self._items: list = []
+        self._start = 0
+        self._next_seq = 0  # Secuencia que recibirá el próximo elemento
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def head_seq(self) -> int:
+        """Secuencia del elemento más antiguo que sigue en el buffer"""
+        return self._next_seq - len(self._items)
+
+    @property
+    def next_seq(self) -> int:
+        return self._next_seq
+
+    def append(self, item):
+        """Agrega un elemento y devuelve el expulsado (o None)"""
+        evicted = None
+        if len(self._items) < self.capacity:
+            self._items.append(item)
+        else:
+            evicted = self._items[self._start]
+            self._items[self._start] = item
+            self._start = (self._start + 1) % self.capacity
+        self._next_seq += 1
+        return evicted
+
+    def get_seq(self, seq: int):
+        """Obtiene un elemento por su número de secuencia absoluto"""
+        offset = seq - self.head_seq
+        if offset < 0 or offset >= len(self._items):
+            raise IndexError(seq)
+        return self._items[(self._start + offset) % len(self._items)]
+
+    def __getitem__(self, index: int):
+        size = len(self._items)
+        if index < 0:
+            index += size
+        if index < 0 or index >= size:
+            raise IndexError(index)
+        return self._items[(self._start + index) % size]
+
+    def __iter__(self) -> Iterator:
+        items = self._items
+        start = self._start
+        yield from items[start:]
+        yield from items[:start]
+
+    def tail(self, limit: Optional[int] = None) -> 'RingView':
+        """Vista (sin copia) de los últimos `limit` elementos"""
+        size = len(self._items)
+        if limit is None or limit > size:
+            limit = size
+        return RingView(self, self._next_seq - max(0, limit), self._next_seq)
+
+    def clear(self):
+        self._items = []
+        self._start = 0
+
+
+class RingView(Sequence):
+    """
+    Vista de solo lectura sobre un rango de secuencias de un RingBuffer.
+
+    No copia los elementos; si el buffer sigue recibiendo inserciones, los
+    elementos que ya fueron expulsados simplemente dejan de estar en la vista.
+    """
+
+    def __init__(self, ring: RingBuffer, start_seq: int, end_seq: int):
+        self._ring = ring
+        self._start_seq = start_seq
+        self._end_seq = end_seq
+
+    def _first_seq(self) -> int:
+        return max(self._start_seq, self._ring.head_seq)
+
+    def __len__(self) -> int:
+        return max(0, self._end_seq - self._first_seq())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        size = len(self)
+        if index < 0:
+            index += size
+        if index < 0 or index >= size:
+            raise IndexError(index)
+        return self._ring.get_seq(self._first_seq() + index)
+
+    def __iter__(self) -> Iterator:
+        for seq in range(self._first_seq(), self._end_seq):
+            try:
+                yield self._ring.get_seq(seq)
+            except IndexError:
+                continue
+
+
+class _SeqList:
+    """Lista creciente de secuencias con descarte O(1) amortizado por el frente"""
+    __slots__ = ('items', 'start')
+
     def __init__(self):
-        self.log_entries: List[dict] = []
+        self.items: List[int] = []
+        self.start = 0
+
+    def __len__(self) -> int:
+        return len(self.items) - self.start
+
+    def append(self, seq: int):
+        self.items.append(seq)
+
+    def drop_before(self, seq: int):
+        items = self.items
+        while self.start < len(items) and items[self.start] < seq:
+            self.start += 1
+        # Reaprovechar memoria cuando la mitad de la lista ya fue descartada
+        if self.start > 1024 and self.start * 2 > len(items):
+            del items[:self.start]
+            self.start = 0
+
+
+class LogIndex:
+    """
+    Índices incrementales sobre un RingBuffer de LogEntry.
+
+    Mantiene, por cada combinación (tipo, éxito), la lista ordenada de
+    secuencias que la contienen, y un índice disperso de marcas de tiempo
+    (una cada `sparse_step` entradas). Ambos se actualizan al agregar y al
+    expulsar entradas del buffer, sin recorrerlo. Las búsquedas por rango
+    de tiempo suponen que las entradas llegan en orden cronológico.
+    """
+
+    def __init__(self, ring: RingBuffer, sparse_step: int = 256):
+        self._ring = ring
+        self.sparse_step = sparse_step
+        self.clear()
+
+    def clear(self):
+        self._by_key: Dict[Tuple[str, bool], _SeqList] = {}
+        self._sparse_ts: List[float] = []
+        self._sparse_seq: List[int] = []
+        self._sparse_start = 0
+
+    def add(self, seq: int, entry: 'LogEntry', evicted: Optional['LogEntry'] = None):
+        """Registra la entrada `seq` y descarta la expulsada del buffer, si la hay"""
+        head = self._ring.head_seq
+        if evicted is not None:
+            key = (evicted.type, evicted.success)
+            seqs = self._by_key.get(key)
+            if seqs is not None:
+                seqs.drop_before(head)
+                if not len(seqs):
+                    del self._by_key[key]
+            while (self._sparse_start < len(self._sparse_seq)
+                   and self._sparse_seq[self._sparse_start] < head):
+                self._sparse_start += 1
+            if self._sparse_start > 1024 and self._sparse_start * 2 > len(self._sparse_seq):
+                del self._sparse_seq[:self._sparse_start]
+                del self._sparse_ts[:self._sparse_start]
+                self._sparse_start = 0
+
+        key = (entry.type, entry.success)
+        seqs = self._by_key.get(key)
+        if seqs is None:
+            seqs = self._by_key[key] = _SeqList()
+        seqs.append(seq)
+        if seq % self.sparse_step == 0:
+            self._sparse_ts.append(entry.ts)
+            self._sparse_seq.append(seq)
+
+    def _bisect_seqs(self, seqs: _SeqList, ts: float, head: int, right: bool = False) -> int:
+        """
+        Primera posición de `seqs` cuya entrada tiene marca de tiempo >= ts
+        (o > ts con right=True)
+        """
+        lo, hi = seqs.start, len(seqs.items)
+        while lo < hi and seqs.items[lo] < head:
+            lo += 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_ts = self._ring.get_seq(seqs.items[mid]).ts
+            if mid_ts < ts or (right and mid_ts == ts):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _seq_at_or_after(self, ts: Optional[float]) -> int:
+        """Secuencia a partir de la cual buscar entradas con marca de tiempo >= ts"""
+        head = self._ring.head_seq
+        if ts is None:
+            return head
+        pos = bisect.bisect_left(self._sparse_ts, ts, self._sparse_start) - 1
+        seq = self._sparse_seq[pos] if pos >= self._sparse_start else head
+        return max(seq, head)
+
+    def query(self, event_type: Optional[str] = None, start: Optional[float] = None,
+              end: Optional[float] = None, success: Optional[bool] = None,
+              limit: Optional[int] = None) -> List['LogEntry']:
+        """Devuelve las entradas que cumplen los filtros, en orden cronológico"""
+        ring = self._ring
+        head, tail = ring.head_seq, ring.next_seq
+
+        if event_type is None and success is None:
+            # Sin índice por clave: el índice disperso acota el inicio del recorrido
+            result = []
+            for seq in range(self._seq_at_or_after(start), tail):
+                entry = ring.get_seq(seq)
+                if start is not None and entry.ts < start:
+                    continue
+                if end is not None and entry.ts > end:
+                    break
+                result.append(entry)
+            return result[-limit:] if limit else result
+
+        ranges = []
+        for (key_type, key_success), seqs in self._by_key.items():
+            if event_type is not None and key_type != event_type:
+                continue
+            if success is not None and key_success != success:
+                continue
+            lo = self._bisect_seqs(seqs, start, head) if start is not None else seqs.start
+            hi = self._bisect_seqs(seqs, end, head, right=True) if end is not None else len(seqs.items)
+            while lo < hi and seqs.items[lo] < head:
+                lo += 1
+            if limit:
+                lo = max(lo, hi - limit)
+            if lo < hi:
+                ranges.append(seqs.items[lo:hi])
+
+        merged = list(heapq.merge(*ranges))
+        if limit:
+            merged = merged[-limit:]
+        return [ring.get_seq(seq) for seq in merged]
+
+
+class LogWriter(threading.Thread):
+    """
+    Hilo escritor de logs.
+
+    Recibe entradas por una cola y las entrega por lotes a `write_batch`,
+    vaciando el lote cuando alcanza `batch_size` entradas o cuando pasan
+    `flush_interval` segundos desde la primera entrada pendiente. También
+    acepta funciones, que se ejecutan en el hilo escritor después de vaciar
+    el lote actual (compactaciones, reescrituras, flush explícito).
+    """
+
+    _STOP = object()
+
+    def __init__(self, write_batch: Callable[[List['LogEntry']], None],
+                 batch_size: int = 256, flush_interval: float = 0.5):
+        super().__init__(name='gip-log-writer', daemon=True)
+        self._write_batch = write_batch
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = max(0.0, float(flush_interval))
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+
+    def submit(self, item):
+        """Encola una entrada o una función para el hilo escritor"""
+        if not self._closed:
+            self._queue.put(item)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que todo lo encolado hasta ahora esté escrito"""
+        if self._closed or not self.is_alive():
+            return False
+        done = threading.Event()
+        self._queue.put(done.set)
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """Vacía la cola y detiene el hilo"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(self._STOP)
+        if self.is_alive():
+            self.join(timeout)
+
+    def _flush_batch(self, batch: list):
+        if batch:
+            try:
+                self._write_batch(batch)
+            except Exception:
+                # Una entrada defectuosa no debe perder el resto del lote
+                for entry in batch:
+                    try:
+                        self._write_batch([entry])
+                    except Exception as e:
+                        print(f"Error al escribir evento de log: {str(e)}")
+            batch.clear()
+
+    def run(self):
+        batch: list = []
+        deadline = 0.0
+        while True:
+            timeout = None
+            if batch:
+                timeout = max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._flush_batch(batch)
+                continue
+
+            if item is self._STOP:
+                self._flush_batch(batch)
+                break
+            if callable(item):
+                self._flush_batch(batch)
+                try:
+                    item()
+                except Exception:
+                    pass
+                continue
+
+            batch.append(item)
+            if len(batch) == 1:
+                deadline = time.monotonic() + self.flush_interval
+            if len(batch) >= self.batch_size:
+                self._flush_batch(batch)
+
+
+class NetworkLogger:
+    # Claves de log_config.json; cada una corresponde a un atributo
+    CONFIG_KEYS = (
+        'max_entries', 'compact_threshold_bytes', 'flush_batch_size', 'flush_interval_ms',
+        'rotate_max_bytes', 'rotate_daily', 'retention_segments', 'retention_days',
+        'coalesce_events', 'coalesce_window_s', 'storage_backend', 'sqlite_path',
+        'min_level', 'rollup_flush_s'
+    )
+
+    def __init__(self, log_path: Optional[str] = None, config_path: Optional[str] = None):
+        self.log_path = log_path or LOG_PATH
+        self.config_path = config_path or LOG_CONFIG_PATH
         self.max_entries = 100  # Máximo número de entradas en memoria
+        self.compact_threshold_bytes = 1024 * 1024  # Tamaño de logs.txt que dispara la compactación
+        self.flush_batch_size = 256  # Entradas por lote del hilo escritor
+        self.flush_interval_ms = 500  # Espera máxima antes de escribir un lote incompleto
+        self.rotate_max_bytes = 0  # Tamaño que dispara la rotación (0 = sin rotación por tamaño)
+        self.rotate_daily = False  # Rotar al cambiar de día
+        self.retention_segments = 0  # Segmentos archivados a conservar (0 = todos)
+        self.retention_days = 0  # Antigüedad máxima del historial (0 = sin límite)
+        self.coalesce_events = True  # Agrupar eventos idénticos consecutivos
+        self.coalesce_window_s = 300  # Cada cuánto se escribe en disco una racha en curso
+        self.storage_backend = 'jsonl'  # 'jsonl' (logs.txt) o 'sqlite'
+        self.sqlite_path = ''  # Ruta de la base SQLite (vacío = logs.db junto a logs.txt)
+        self.min_level = 'info'  # Nivel mínimo que se registra (debug, info, warning, error)
+        self.rollup_flush_s = 30  # Cada cuánto se guardan las estadísticas por hora
+        self._lock = threading.Lock()
+        self._pending_fold: Optional[LogEntry] = None  # Repeticiones aún no escritas en disco
         self.load_config()
+        self.set_min_level(self.min_level)
+        self.storage = self._open_storage()
+        self.log_entries = RingBuffer(self.max_entries)
+        self.index = LogIndex(self.log_entries)
+        self.rollups = RollupStore(os.path.join(os.path.dirname(self.log_path), 'log_rollups.json'),
+                                   self.rollup_flush_s)
         self.load_logs()
+        self._writer = LogWriter(self._write_batch, self.flush_batch_size, self.flush_interval_ms / 1000.0)
+        self._writer.start()
+        atexit.register(self.close)
     
     def load_config(self):
         """Carga la configuración del logger"""
         try:
-            if os.path.exists(LOG_CONFIG_PATH):
-                with open(LOG_CONFIG_PATH, 'r', encoding='utf-8') as f:
+            if os.path.exists(self.config_path):
+                with open(self.config_path, 'r', encoding='utf-8') as f:
                     config = json.load(f)
-                    self.max_entries = config.get('max_entries', 100)
+                    for key in self.CONFIG_KEYS:
+                        setattr(self, key, config.get(key, getattr(self, key)))
         except Exception:
             pass
 
     def save_config(self):
         """Guarda la configuración del logger"""
         try:
-            os.makedirs(os.path.dirname(LOG_CONFIG_PATH), exist_ok=True)
-            with open(LOG_CONFIG_PATH, 'w', encoding='utf-8') as f:
-                json.dump({'max_entries': self.max_entries}, f)
+            os.makedirs(os.path.dirname(self.config_path), exist_ok=True)
+            with open(self.config_path, 'w', encoding='utf-8') as f:
+                json.dump({key: getattr(self, key) for key in self.CONFIG_KEYS}, f)
         except Exception:
             pass
 
+    def set_min_level(self, level: str):
+        """Cambia el nivel mínimo de registro"""
+        self.min_level = level if level in LEVELS else 'info'
+        self._min_levelno = LEVELS[self.min_level]
+
+    def is_enabled_for(self, level: str) -> bool:
+        """Indica si un evento de ese nivel se registraría"""
+        return LEVELS.get(level, LEVELS['info']) >= self._min_levelno
+
+    def _open_storage(self) -> LogStorage:
+        """Crea el backend de almacenamiento elegido en log_config.json"""
+        if self.storage_backend == 'sqlite':
+            path = self.sqlite_path or os.path.join(os.path.dirname(self.log_path), 'logs.db')
+            try:
+                return SqliteStorage(path, retention_days=self.retention_days)
+            except Exception as e:
+                print(f"Error al abrir la base de logs {path}: {str(e)}")
+        return JsonLinesStorage(
+            self.log_path,
+            max_entries=self.max_entries,
+            compact_threshold_bytes=self.compact_threshold_bytes,
+            rotate_max_bytes=self.rotate_max_bytes,
+            rotate_daily=self.rotate_daily,
+            retention_segments=self.retention_segments,
+            retention_days=self.retention_days
+        )
+
     def load_logs(self):
-        """Carga los logs existentes"""
+        """
+        Carga los logs existentes
+
+        Solo se leen las últimas max_entries entradas del almacenamiento,
+        así que el arranque no depende del tamaño del historial.
+        """
         try:
-            if os.path.exists(LOG_PATH):
-                with open(LOG_PATH, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        try:
-                            entry = json.loads(line.strip())
-                            self.log_entries.append(entry)
-                        except:
-                            continue
-                # Mantener solo las últimas max_entries
-                self.log_entries = self.log_entries[-self.max_entries:]
+            for row in self.storage.load_tail(self.max_entries):
+                entry = LogEntry(*row)
+                if not self._fold_into_last(entry):
+                    self._remember(entry)
         except Exception:
             pass
 
     def save_logs(self):
-        """Guarda los logs en disco"""
+        """
+        Reescribe el almacenamiento con las entradas en memoria.
+
+        La reescritura se encola en el hilo escritor, detrás de las entradas
+        pendientes, así que no bloquea a quien la llama.
+        """
+        with self._lock:
+            # Copias: las entradas en memoria siguen acumulando repeticiones
+            snapshot = [entry.copy() for entry in self.log_entries]
+            # La instantánea ya incluye las repeticiones pendientes
+            self._pending_fold = None
+        self._writer.submit(lambda: self.storage.rewrite(snapshot))
+
+    def _write_batch(self, batch: List[LogEntry]):
+        """Escribe un lote (en el hilo escritor) y guarda las estadísticas si toca"""
         try:
-            os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
-            with open(LOG_PATH, 'w', encoding='utf-8') as f:
-                for entry in self.log_entries:
-                    f.write(json.dumps(entry) + '\n')
-        except Exception:
-            pass
+            self.storage.write_batch(batch)
+        finally:
+            self.rollups.save_if_due()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que las entradas registradas hasta ahora estén en disco"""
+        with self._lock:
+            self._submit_pending_fold()
+        return self._writer.flush(timeout)
+
+    def close(self):
+        """Escribe todo lo pendiente y detiene el hilo escritor"""
+        with self._lock:
+            self._submit_pending_fold()
+        self._writer.close()
+        self.storage.close()
+        self.rollups.close()
+
+    def iter_history(self) -> Iterator[LogEntry]:
+        """
+        Recorre todo el historial en disco, del evento más antiguo al más reciente.
+
+        Es un flujo: no carga el historial en memoria. Las entradas que todavía
+        están en la cola del hilo escritor no aparecen hasta el siguiente lote.
+        """
+        for row in self.storage.iter_rows():
+            yield LogEntry(*row)
+
+    def query_history(self, event_type: Optional[str] = None,
+                      start: Union[datetime, float, None] = None,
+                      end: Union[datetime, float, None] = None,
+                      success: Optional[bool] = None,
+                      limit: Optional[int] = None) -> List[LogEntry]:
+        """
+        Igual que query_logs, pero sobre todo el historial en disco.
+
+        Con SQLite se resuelve con los índices de la base; con JSON Lines
+        recorre los segmentos como un flujo.
+        """
+        if isinstance(start, datetime):
+            start = start.timestamp()
+        if isinstance(end, datetime):
+            end = end.timestamp()
+        return [LogEntry(*row) for row in self.storage.query_rows(event_type, start, end, success, limit)]
+
+    def rebuild_rollups(self):
+        """
+        Recalcula las estadísticas por hora desde el historial en disco.
+
+        Es una sola pasada sobre iter_history; las repeticiones agrupadas
+        cuentan con su `count`.
+        """
+        self.flush()
+        self.rollups.rebuild(self.iter_history())
+
+    def get_rollups(self, event_type: Optional[str] = None,
+                    start: Union[datetime, float, None] = None,
+                    end: Union[datetime, float, None] = None) -> List[dict]:
+        """
+        Contadores de éxitos y fallos por hora, sin leer el historial
+        
+        Args:
+            event_type: Tipo de evento (None = todos)
+            start: Inicio del rango (datetime o epoch); incluye su hora
+            end: Fin del rango, inclusive (datetime o epoch)
+            
+        Returns:
+            Lista de {'hour', 'type', 'success', 'failure'} ordenada por hora
+        """
+        if isinstance(start, datetime):
+            start = start.timestamp()
+        if isinstance(end, datetime):
+            end = end.timestamp()
+        return self.rollups.query(event_type, start, end)
+
+    def failure_rate_by_hour(self, event_type: str,
+                             start: Union[datetime, float, None] = None,
+                             end: Union[datetime, float, None] = None) -> List[dict]:
+        """
+        Tasa de fallos por hora de un tipo de evento, p. ej. los restore_dhcp
+        de los últimos 90 días
+        
+        Returns:
+            Lista de {'hour', 'total', 'failure_rate'} ordenada por hora
+        """
+        rates = []
+        for row in self.get_rollups(event_type, start, end):
+            total = row['success'] + row['failure']
+            rates.append({
+                'hour': row['hour'],
+                'total': total,
+                'failure_rate': row['failure'] / total if total else 0.0
+            })
+        return rates
 
     def log_connection_event(self, event_type: str, details: str, success: bool = True):
         """
         Registra un evento de conexión
         
+        El evento queda disponible en memoria de inmediato; la escritura en
+        disco la hace el hilo escritor por lotes. Si es idéntico al anterior
+        (mismo tipo, detalles y éxito) se acumula en la misma entrada.
+        
         Args:
             event_type: Tipo de evento (ip_change, dns_change, dhcp, test, etc)
             details: Detalles del evento
             success: Si el evento fue exitoso
         """
-        timestamp = datetime.now().isoformat()
-        entry = {
-            'timestamp': timestamp,
-            'type': event_type,
-            'details': details,
-            'success': success
-        }
+        level = 'info' if success else 'error'
+        if LEVELS[level] < self._min_levelno:
+            return
+        self._record(LogEntry(datetime.now().timestamp(), event_type, details, success, level=level))
+
+    def log_event(self, event_type: str, fields: Union[dict, Callable[[], dict], None] = None,
+                  level: str = 'info', message: str = '', *args, success: Optional[bool] = None):
+        """
+        Registra un evento estructurado
         
-        self.log_entries.append(entry)
-        if len(self.log_entries) > self.max_entries:
-            self.log_entries.pop(0)
+        El nivel se comprueba antes de tocar los argumentos: si el evento
+        queda filtrado no se formatea el mensaje ni se construyen los campos.
         
-        self.save_logs()
+        Args:
+            event_type: Tipo de evento (change_ip, set_dns, ping_test, etc)
+            fields: Campos del evento, o una función que los devuelve (se
+                llama solo si el evento se registra)
+            level: debug, info, warning o error
+            message: Mensaje opcional; se formatea con `args` al estilo %
+            success: Resultado del evento; por defecto fields['success'] o,
+                si no está, False solo para el nivel error
+        """
+        levelno = LEVELS.get(level, LEVELS['info'])
+        if levelno < self._min_levelno:
+            return
+        if callable(fields):
+            fields = fields()
+        fields = dict(fields) if fields else {}
+        if success is None:
+            success = fields.pop('success', levelno < LEVELS['error'])
+        else:
+            fields.pop('success', None)
+        if args:
+            message = message % args
+        details = message or ', '.join(f"{key}={value}" for key, value in fields.items())
+        self._record(LogEntry(datetime.now().timestamp(), event_type, details, success,
+                              level=level, fields=fields))
+
+    def log_debug(self, message: str, *args, event_type: str = 'debug', **fields):
+        """Registra un mensaje de depuración (formato % diferido)"""
+        if LEVELS['debug'] >= self._min_levelno:
+            self.log_event(event_type, fields, 'debug', message, *args)
+
+    def log_info(self, message: str, *args, event_type: str = 'info', **fields):
+        """Registra un mensaje informativo (formato % diferido)"""
+        if LEVELS['info'] >= self._min_levelno:
+            self.log_event(event_type, fields, 'info', message, *args)
+
+    def log_warning(self, message: str, *args, event_type: str = 'warning', **fields):
+        """Registra una advertencia (formato % diferido)"""
+        if LEVELS['warning'] >= self._min_levelno:
+            self.log_event(event_type, fields, 'warning', message, *args)
+
+    def log_error(self, event_type: str, message: str = '', *args, **fields):
+        """Registra un error de una operación, p. ej. log_error('ping_test', str(e))"""
+        if LEVELS['error'] >= self._min_levelno:
+            self.log_event(event_type, fields, 'error', message, *args)
+
+    def _record(self, entry: LogEntry):
+        """Guarda una entrada en memoria y la encola para disco, agrupando repeticiones"""
+        self.rollups.add(entry.type, entry.ts, entry.success)
+        with self._lock:
+            if self._fold_into_last(entry):
+                # Repetición: se acumula y se escribe como una sola línea
+                # al cerrarse la racha o al cumplirse coalesce_window_s
+                pending = self._pending_fold
+                if pending is not None and entry.ts - pending.ts >= self.coalesce_window_s:
+                    self._submit_pending_fold()
+                    pending = None
+                if pending is None:
+                    self._pending_fold = entry.copy()
+                else:
+                    pending.fold(entry)
+                return
+            self._submit_pending_fold()
+            self._remember(entry)
+            # El hilo escritor recibe una copia porque la entrada en memoria
+            # puede seguir acumulando repeticiones antes de escribirse
+            self._writer.submit(entry.copy())
+
+    def _fold_into_last(self, entry: LogEntry) -> bool:
+        """Suma `entry` a la última entrada en memoria si es el mismo evento"""
+        if not self.coalesce_events or not len(self.log_entries):
+            return False
+        last = self.log_entries[-1]
+        if not last.same_event(entry):
+            return False
+        last.fold(entry)
+        return True
+
+    def _submit_pending_fold(self):
+        """Encola la racha de repeticiones pendiente (con el lock tomado)"""
+        if self._pending_fold is not None:
+            self._writer.submit(self._pending_fold)
+            self._pending_fold = None
+
+    def _remember(self, entry: LogEntry):
+        """Agrega la entrada al buffer en memoria y a los índices"""
+        seq = self.log_entries.next_seq
+        evicted = self.log_entries.append(entry)
+        self.index.add(seq, entry, evicted)
+
+    def query_logs(self, event_type: Optional[str] = None,
+                   start: Union[datetime, float, None] = None,
+                   end: Union[datetime, float, None] = None,
+                   success: Optional[bool] = None,
+                   limit: Optional[int] = None) -> List[LogEntry]:
+        """
+        Consulta los eventos en memoria usando los índices
+        
+        Args:
+            event_type: Tipo de evento a buscar (None = todos)
+            start: Inicio del rango de tiempo, inclusive (datetime o epoch)
+            end: Fin del rango de tiempo, inclusive (datetime o epoch)
+            success: Filtrar por éxito o fallo (None = ambos)
+            limit: Devolver solo los N eventos más recientes que cumplan
+            
+        Returns:
+            Lista de eventos en orden cronológico
+        """
+        if isinstance(start, datetime):
+            start = start.timestamp()
+        if isinstance(end, datetime):
+            end = end.timestamp()
+        with self._lock:
+            return self.index.query(event_type, start, end, success, limit)
 
-    def get_recent_logs(self, limit: Optional[int] = None) -> List[dict]:
+    def get_recent_logs(self, limit: Optional[int] = None) -> RingView:
         """
         Obtiene los logs más recientes
         
@@ -90,16 +816,19 @@ class NetworkLogger:
             limit: Número máximo de logs a retornar
             
         Returns:
-            Lista de los últimos eventos registrados
+            Vista (sin copia) de los últimos eventos registrados, del más
+            antiguo al más reciente
         """
-        if limit is None or limit > len(self.log_entries):
-            return self.log_entries
-        return self.log_entries[-limit:]
+        return self.log_entries.tail(limit)
 
     def clear_logs(self):
-        """Limpia todos los logs"""
-        self.log_entries.clear()
-        self.save_logs()
+        """Limpia todos los logs, incluido el historial archivado"""
+        with self._lock:
+            self.log_entries.clear()
+            self.index.clear()
+            self._pending_fold = None
+        self._writer.submit(self.storage.clear)
+        self._writer.submit(lambda: self.rollups.rebuild([]))
 
 # Alias para mantener compatibilidad
 Logger = NetworkLogger
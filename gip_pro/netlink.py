@@ -0,0 +1,286 @@
+# Cliente rtnetlink en Python puro (solo Linux)
+# Cambia direcciones, rutas y estado de enlace hablando directamente con el
+# kernel por un socket AF_NETLINK, sin lanzar procesos `ip`.
+import errno
+import ipaddress
+import os
+import socket
+import struct
+from typing import Dict, List, Optional, Tuple
+
+# Tipos de mensaje
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+RTM_NEWLINK = 16
+RTM_GETLINK = 18
+RTM_NEWADDR = 20
+RTM_DELADDR = 21
+RTM_GETADDR = 22
+RTM_NEWROUTE = 24
+RTM_DELROUTE = 25
+RTM_GETROUTE = 26
+
+# Flags de nlmsghdr
+NLM_F_REQUEST = 0x1
+NLM_F_MULTI = 0x2
+NLM_F_ACK = 0x4
+NLM_F_DUMP = 0x300
+NLM_F_REPLACE = 0x100
+NLM_F_EXCL = 0x200
+NLM_F_CREATE = 0x400
+
+# Atributos
+IFA_ADDRESS = 1
+IFA_LOCAL = 2
+RTA_DST = 1
+RTA_OIF = 4
+RTA_GATEWAY = 5
+RTA_TABLE = 15
+
+RT_TABLE_MAIN = 254
+RTPROT_STATIC = 4
+RT_SCOPE_UNIVERSE = 0
+RT_SCOPE_LINK = 253
+RTN_UNICAST = 1
+IFF_UP = 0x1
+
+_NLMSGHDR = struct.Struct('=IHHII')  # len, type, flags, seq, pid
+_IFADDRMSG = struct.Struct('=BBBBI')  # family, prefixlen, flags, scope, index
+_IFINFOMSG = struct.Struct('=BxHiII')  # family, type, index, flags, change
+_RTMSG = struct.Struct('=BBBBBBBBI')  # family, dst_len, src_len, tos, table, protocol, scope, type, flags
+_RTATTR = struct.Struct('=HH')  # len, type
+
+
+class NetlinkError(OSError):
+    """Error devuelto por el kernel para un mensaje netlink"""
+
+
+def is_available() -> bool:
+    """Indica si este sistema tiene sockets rtnetlink"""
+    return hasattr(socket, 'AF_NETLINK') and hasattr(socket, 'NETLINK_ROUTE')
+
+
+def _align(length: int) -> int:
+    return (length + 3) & ~3
+
+
+def _attr(attr_type: int, data: bytes) -> bytes:
+    length = _RTATTR.size + len(data)
+    return _RTATTR.pack(length, attr_type) + data + b'\0' * (_align(length) - length)
+
+
+def _parse_attrs(data: bytes, offset: int) -> Dict[int, bytes]:
+    attrs = {}
+    while offset + _RTATTR.size <= len(data):
+        length, attr_type = _RTATTR.unpack_from(data, offset)
+        if length < _RTATTR.size:
+            break
+        attrs[attr_type] = data[offset + _RTATTR.size:offset + length]
+        offset += _align(length)
+    return attrs
+
+
+def _ifindex(ifname: str) -> int:
+    try:
+        return socket.if_nametoindex(ifname)
+    except OSError:
+        raise NetlinkError(errno.ENODEV, f'No existe la interfaz {ifname}')
+
+
+class NetlinkSocket:
+    """
+    Socket NETLINK_ROUTE con envío por lotes.
+
+    Los cambios se acumulan con add_address, add_route, set_link, etc. y
+    commit() los manda todos en un solo send(); el kernel los procesa en
+    orden y responde un ACK por mensaje. Usado como contexto, commit() se
+    llama al salir del bloque sin errores.
+    """
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+        self.sock.bind((0, 0))
+        self._seq = 0
+        self._pending: List[Tuple[int, bytes]] = []  # (seq, mensaje)
+
+    def __enter__(self) -> 'NetlinkSocket':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.commit()
+        finally:
+            self.close()
+
+    def close(self):
+        self.sock.close()
+
+    def _message(self, msg_type: int, flags: int, body: bytes) -> Tuple[int, bytes]:
+        self._seq += 1
+        header = _NLMSGHDR.pack(_NLMSGHDR.size + len(body), msg_type, flags | NLM_F_REQUEST, self._seq, 0)
+        return self._seq, header + body
+
+    def _queue(self, msg_type: int, flags: int, body: bytes):
+        self._pending.append(self._message(msg_type, flags | NLM_F_ACK, body))
+
+    def _receive(self):
+        """Devuelve los mensajes de una lectura como (tipo, flags, seq, datos)"""
+        data = self.sock.recv(1 << 16)
+        offset = 0
+        while offset + _NLMSGHDR.size <= len(data):
+            length, msg_type, flags, seq, _ = _NLMSGHDR.unpack_from(data, offset)
+            if length < _NLMSGHDR.size:
+                break
+            yield msg_type, flags, seq, data[offset + _NLMSGHDR.size:offset + length]
+            offset += _align(length)
+
+    def commit(self):
+        """
+        Envía los cambios pendientes en un solo lote y espera sus ACK.
+
+        Raises:
+            NetlinkError: con el primer error que informe el kernel (los
+                demás mensajes del lote se procesan igual)
+        """
+        if not self._pending:
+            return
+        pending = {seq for seq, _ in self._pending}
+        self.sock.sendall(b''.join(message for _, message in self._pending))
+        self._pending = []
+        first_error = None
+        while pending:
+            for msg_type, _, seq, payload in self._receive():
+                if msg_type != NLMSG_ERROR or seq not in pending:
+                    continue
+                pending.discard(seq)
+                code = -struct.unpack_from('=i', payload)[0]
+                if code and first_error is None:
+                    first_error = NetlinkError(code, os.strerror(code))
+        if first_error is not None:
+            raise first_error
+
+    def _dump(self, msg_type: int, body: bytes) -> List[bytes]:
+        """Pide un volcado (RTM_GET*) y devuelve los mensajes recibidos"""
+        seq, message = self._message(msg_type, NLM_F_DUMP, body)
+        self.sock.sendall(message)
+        results = []
+        while True:
+            for reply_type, _, reply_seq, payload in self._receive():
+                if reply_seq != seq:
+                    continue
+                if reply_type == NLMSG_DONE:
+                    return results
+                if reply_type == NLMSG_ERROR:
+                    code = -struct.unpack_from('=i', payload)[0]
+                    if code:
+                        raise NetlinkError(code, os.strerror(code))
+                    return results
+                results.append(payload)
+
+    # Consultas (inmediatas)
+
+    def get_addresses(self, ifname: Optional[str] = None) -> List[Tuple[str, str, int]]:
+        """Direcciones IPv4 como (interfaz, ip, prefijo)"""
+        index = _ifindex(ifname) if ifname else None
+        addresses = []
+        for payload in self._dump(RTM_GETADDR, _IFADDRMSG.pack(socket.AF_INET, 0, 0, 0, 0)):
+            family, prefix, _, _, addr_index = _IFADDRMSG.unpack_from(payload)
+            if family != socket.AF_INET or (index is not None and addr_index != index):
+                continue
+            attrs = _parse_attrs(payload, _IFADDRMSG.size)
+            raw = attrs.get(IFA_LOCAL) or attrs.get(IFA_ADDRESS)
+            if raw:
+                addresses.append((socket.if_indextoname(addr_index), socket.inet_ntoa(raw), prefix))
+        return addresses
+
+    def get_default_gateway(self, ifname: Optional[str] = None) -> Optional[str]:
+        """Puerta de enlace de la ruta por defecto IPv4 (de la interfaz, si se indica)"""
+        index = _ifindex(ifname) if ifname else None
+        for payload in self._dump(RTM_GETROUTE, _RTMSG.pack(socket.AF_INET, 0, 0, 0, 0, 0, 0, 0, 0)):
+            family, dst_len, _, _, table, _, _, _, _ = _RTMSG.unpack_from(payload)
+            if family != socket.AF_INET or dst_len != 0 or table != RT_TABLE_MAIN:
+                continue
+            attrs = _parse_attrs(payload, _RTMSG.size)
+            if index is not None and struct.unpack('=I', attrs.get(RTA_OIF, b'\0\0\0\0'))[0] != index:
+                continue
+            if RTA_GATEWAY in attrs:
+                return socket.inet_ntoa(attrs[RTA_GATEWAY])
+        return None
+
+    def is_link_up(self, ifname: str) -> bool:
+        """Indica si la interfaz está administrativamente activa"""
+        index = _ifindex(ifname)
+        for payload in self._dump(RTM_GETLINK, _IFINFOMSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0)):
+            _, _, link_index, flags, _ = _IFINFOMSG.unpack_from(payload)
+            if link_index == index:
+                return bool(flags & IFF_UP)
+        return False
+
+    # Cambios (se acumulan hasta commit)
+
+    def set_link(self, ifname: str, up: bool):
+        """Activa o desactiva la interfaz"""
+        body = _IFINFOMSG.pack(socket.AF_UNSPEC, 0, _ifindex(ifname), IFF_UP if up else 0, IFF_UP)
+        self._queue(RTM_NEWLINK, 0, body)
+
+    def _address_message(self, ifname: str, ip: str, prefix: int) -> bytes:
+        raw = socket.inet_aton(ip)
+        return (_IFADDRMSG.pack(socket.AF_INET, int(prefix), 0, RT_SCOPE_UNIVERSE, _ifindex(ifname)) +
+                _attr(IFA_LOCAL, raw) + _attr(IFA_ADDRESS, raw))
+
+    def add_address(self, ifname: str, ip: str, prefix: int, replace: bool = True):
+        """Agrega una dirección IPv4 (con replace, sin error si ya existe)"""
+        flags = NLM_F_CREATE | (NLM_F_REPLACE if replace else NLM_F_EXCL)
+        self._queue(RTM_NEWADDR, flags, self._address_message(ifname, ip, prefix))
+
+    def delete_address(self, ifname: str, ip: str, prefix: int):
+        """Quita una dirección IPv4"""
+        self._queue(RTM_DELADDR, 0, self._address_message(ifname, ip, prefix))
+
+    def flush_addresses(self, ifname: str):
+        """Quita todas las direcciones IPv4 de la interfaz (se lee el estado ahora)"""
+        for _, ip, prefix in self.get_addresses(ifname):
+            self.delete_address(ifname, ip, prefix)
+
+    def _route_message(self, destination: str, gateway: Optional[str], ifname: Optional[str]) -> bytes:
+        network = ipaddress.IPv4Network(destination, strict=False)
+        scope = RT_SCOPE_UNIVERSE if gateway else RT_SCOPE_LINK
+        body = _RTMSG.pack(socket.AF_INET, network.prefixlen, 0, 0, RT_TABLE_MAIN,
+                           RTPROT_STATIC, scope, RTN_UNICAST, 0)
+        if network.prefixlen:
+            body += _attr(RTA_DST, network.network_address.packed)
+        if gateway:
+            body += _attr(RTA_GATEWAY, socket.inet_aton(gateway))
+        if ifname:
+            body += _attr(RTA_OIF, struct.pack('=I', _ifindex(ifname)))
+        return body
+
+    def add_route(self, destination: str = '0.0.0.0/0', gateway: Optional[str] = None,
+                  ifname: Optional[str] = None, replace: bool = True):
+        """Agrega una ruta IPv4 en la tabla principal (por defecto, la ruta por defecto)"""
+        flags = NLM_F_CREATE | (NLM_F_REPLACE if replace else NLM_F_EXCL)
+        self._queue(RTM_NEWROUTE, flags, self._route_message(destination, gateway, ifname))
+
+    def delete_route(self, destination: str = '0.0.0.0/0', gateway: Optional[str] = None,
+                     ifname: Optional[str] = None):
+        """Quita una ruta IPv4 de la tabla principal"""
+        self._queue(RTM_DELROUTE, 0, self._route_message(destination, gateway, ifname))
+
+
+def set_ipv4_config(ifname: str, ip: str, prefix: int, gateway: Optional[str] = None,
+                    flush: bool = True):
+    """
+    Deja la interfaz con una sola dirección IPv4 y, si se indica, la ruta
+    por defecto por `gateway`; equivale a `ip addr flush`, `ip addr add`,
+    `ip link set up` e `ip route replace default`, en un solo lote.
+    """
+    with NetlinkSocket() as nl:
+        if flush:
+            for _, old_ip, old_prefix in nl.get_addresses(ifname):
+                if (old_ip, old_prefix) != (ip, int(prefix)):
+                    nl.delete_address(ifname, old_ip, old_prefix)
+        nl.set_link(ifname, True)
+        nl.add_address(ifname, ip, prefix)
+        if gateway:
+            nl.add_route('0.0.0.0/0', gateway, ifname)
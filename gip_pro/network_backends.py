@@ -0,0 +1,502 @@
+# Backends de configuración de red (nmcli, netsh, iproute2, netlink y uno simulado)
+import asyncio
+import os
+import re
+import subprocess
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from . import netlink
+from .validator import parse_mask
+
+IPV4_RE = re.compile(r'\b(?:\d{1,3}\.){3}\d{1,3}\b')
+
+# Variable de entorno para elegir el backend sin tocar el código (p. ej. 'fake')
+BACKEND_ENV = 'GIP_NETWORK_BACKEND'
+
+def mask_to_prefix(mask):
+    """
+    Convierte una máscara (255.255.255.0, '24', '/24' o vacía) en longitud
+    de prefijo, con las mismas reglas que validator.parse_mask
+
+    Raises:
+        ValueError: Si la máscara no es válida
+    """
+    prefix = parse_mask(mask)
+    if prefix is None:
+        raise ValueError(f'Máscara inválida: {mask}')
+    return prefix
+
+def prefix_to_mask(prefix):
+    """Convierte una longitud de prefijo en máscara decimal"""
+    value = (0xFFFFFFFF << (32 - int(prefix))) & 0xFFFFFFFF
+    return '.'.join(str((value >> shift) & 0xFF) for shift in (24, 16, 8, 0))
+
+def check_interface_name(interface):
+    """Rechaza nombres de interfaz que podrían romper un script de netsh"""
+    if not interface or any(c in interface for c in '"\r\n'):
+        raise ValueError(f'Nombre de interfaz inválido: {interface!r}')
+    return interface
+
+def empty_state():
+    """Estado de interfaz sin datos; el planificador lo trata como distinto de todo"""
+    return {'method': None, 'ip': None, 'prefix': None, 'gateway': None, 'dns': None}
+
+
+class NetworkBackend:
+    """
+    Interfaz común de los backends.
+
+    Un backend lee el estado IPv4 de una interfaz (get_state) y aplica los
+    planes de NetworkTools.plan_profile (apply). Los backends de kernel
+    (iproute2, netlink) además cambian direcciones y enlaces directamente
+    (set_address, set_link). Esta clase base es la de los sistemas sin
+    soporte: todas sus operaciones fallan.
+
+    Cada operación está escrita una sola vez como generador de pasos: cada
+    paso es un comando (args, capture), cuya salida se devuelve al
+    generador, o un número de segundos a esperar. _drive ejecuta los pasos
+    con subprocess y _adrive con asyncio, así que cada operación tiene su
+    versión bloqueante (get_state) y su corrutina (aget_state).
+    """
+
+    name = 'none'
+    requires_admin = True  # Si NetworkTools debe comprobar privilegios
+    supports_dns = True  # Si puede aplicar cambios de DNS
+    kernel = False  # Si cambia el kernel directamente, sin gestor de red
+
+    def _run(self, args, capture=False):
+        """
+        Ejecuta un comando sin shell (los argumentos van tal cual al proceso).
+
+        Returns:
+            La salida estándar si capture es True
+        """
+        if capture:
+            return subprocess.check_output(args, text=True, stderr=subprocess.DEVNULL)
+        subprocess.run(args, check=True)
+
+    async def _arun(self, args, capture=False):
+        """Igual que _run, sin bloquear el bucle de eventos"""
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.PIPE if capture else None,
+            stderr=asyncio.subprocess.DEVNULL if capture else None)
+        output, _ = await process.communicate()
+        if process.returncode:
+            raise subprocess.CalledProcessError(process.returncode, args, output)
+        return output.decode(errors='replace') if capture else None
+
+    def _drive(self, steps):
+        """Ejecuta los pasos de una operación de forma bloqueante"""
+        result = None
+        try:
+            while True:
+                step = steps.send(result)
+                if isinstance(step, (int, float)):
+                    time.sleep(step)
+                    result = None
+                else:
+                    result = self._run(*step)
+        except StopIteration as stop:
+            return stop.value
+        finally:
+            steps.close()  # Si un comando falla, el generador limpia lo suyo
+
+    async def _adrive(self, steps):
+        """Ejecuta los pasos de una operación en el bucle de eventos"""
+        result = None
+        try:
+            while True:
+                step = steps.send(result)
+                if isinstance(step, (int, float)):
+                    await asyncio.sleep(step)
+                    result = None
+                else:
+                    result = await self._arun(*step)
+        except StopIteration as stop:
+            return stop.value
+        finally:
+            steps.close()  # Si un comando falla, el generador limpia lo suyo
+
+    # Pasos de cada operación (generadores); los backends los redefinen
+
+    def _get_state_steps(self, interface):
+        raise NotImplementedError('Solo implementado para Windows y Linux')
+
+    def _apply_steps(self, plan):
+        raise NotImplementedError('Solo implementado para Windows y Linux')
+
+    def _restore_dhcp_steps(self, interface):
+        raise NotImplementedError('Solo implementado para Windows y Linux')
+
+    def _set_address_steps(self, interface, ip, prefix, gateway=None):
+        raise NotImplementedError(f'El backend {self.name} no cambia direcciones en el kernel')
+
+    def _set_link_steps(self, interface, up):
+        raise NotImplementedError(f'El backend {self.name} no cambia el estado del enlace')
+
+    # Operaciones bloqueantes
+
+    def get_state(self, interface) -> Dict:
+        return self._drive(self._get_state_steps(interface))
+
+    def apply(self, plan):
+        return self._drive(self._apply_steps(plan))
+
+    def restore_dhcp(self, interface):
+        return self._drive(self._restore_dhcp_steps(interface))
+
+    def set_address(self, interface, ip, prefix, gateway=None):
+        return self._drive(self._set_address_steps(interface, ip, prefix, gateway))
+
+    def set_link(self, interface, up):
+        return self._drive(self._set_link_steps(interface, up))
+
+    # Corrutinas (ver AsyncNetworkTools)
+
+    async def aget_state(self, interface) -> Dict:
+        return await self._adrive(self._get_state_steps(interface))
+
+    async def aapply(self, plan):
+        return await self._adrive(self._apply_steps(plan))
+
+    async def arestore_dhcp(self, interface):
+        return await self._adrive(self._restore_dhcp_steps(interface))
+
+    async def aset_address(self, interface, ip, prefix, gateway=None):
+        return await self._adrive(self._set_address_steps(interface, ip, prefix, gateway))
+
+    async def aset_link(self, interface, up):
+        return await self._adrive(self._set_link_steps(interface, up))
+
+    def list_interfaces(self) -> Optional[List[str]]:
+        """Interfaces conocidas por el backend (None = usar la detección general)"""
+        return None
+
+
+class NmcliBackend(NetworkBackend):
+    """Conexiones de NetworkManager (Linux); los cambios son persistentes"""
+
+    name = 'nmcli'
+
+    def _modify(self, interface, properties):
+        """Comando que aplica todas las propiedades con un solo 'nmcli con mod'"""
+        args = ['nmcli', 'con', 'mod', interface]
+        for name, value in properties:
+            args += [name, value]
+        return args, False
+
+    def _get_state_steps(self, interface):
+        state = empty_state()
+        output = yield ['nmcli', '-g', 'ipv4.method,ipv4.addresses,ipv4.gateway,ipv4.dns',
+                        'con', 'show', interface], True
+        lines = (output.splitlines() + [''] * 4)[:4]
+        method, addresses, gateway, dns = [line.strip() for line in lines]
+        state['method'] = 'auto' if method == 'auto' else 'manual'
+        if addresses:
+            ip, _, prefix = addresses.split(',')[0].strip().partition('/')
+            state['ip'] = ip
+            state['prefix'] = int(prefix or 32)
+        else:
+            state['ip'] = ''
+        state['gateway'] = gateway
+        state['dns'] = [d.strip() for d in dns.split(',') if d.strip()]
+        return state
+
+    def _apply_steps(self, plan):
+        interface = plan['interface']
+        changes = plan['changes']
+        properties = []
+        if 'address' in changes:
+            ip, prefix = changes['address']
+            properties.append(('ipv4.addresses', f'{ip}/{prefix}'))
+        if 'gateway' in changes:
+            properties.append(('ipv4.gateway', changes['gateway']))
+        if 'method' in changes:
+            properties.append(('ipv4.method', changes['method']))
+        if 'dns' in changes:
+            properties.append(('ipv4.dns', ','.join(changes['dns'])))
+        yield self._modify(interface, properties)
+        if plan['reconnect']:
+            yield ['nmcli', 'con', 'up', interface], False
+        else:
+            # Solo DNS: se aplica al dispositivo activo sin cortar el enlace
+            devices = yield ['nmcli', '-g', 'GENERAL.DEVICES', 'con', 'show', interface], True
+            for device in filter(None, devices.strip().split(',')):
+                yield ['nmcli', 'device', 'reapply', device], False
+
+    def _restore_dhcp_steps(self, interface):
+        yield self._modify(interface, [('ipv4.method', 'auto')])
+        yield ['nmcli', 'con', 'up', interface], False
+
+
+class NetshBackend(NetworkBackend):
+    """netsh de Windows; cada cambio es un solo script 'netsh -f'"""
+
+    name = 'netsh'
+
+    def _script_steps(self, commands):
+        """Ejecuta varios comandos de netsh con una sola invocación (netsh -f)"""
+        fd, path = tempfile.mkstemp(suffix='.netsh', text=True)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(commands) + '\n')
+            yield ['netsh', '-f', path], False
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _get_state_steps(self, interface):
+        state = empty_state()
+        output = yield ['netsh', 'interface', 'ip', 'show', 'config', f'name={interface}'], True
+        dns = []
+        in_dns = False
+        for line in output.splitlines():
+            key, _, value = line.partition(':')
+            key = key.strip().lower()
+            addresses = IPV4_RE.findall(line)
+            if value.strip():
+                in_dns = 'dns' in key
+            if 'dhcp' in key and 'dns' not in key:
+                state['method'] = 'auto' if value.strip().lower() in ('yes', 'sí', 'si') else 'manual'
+            elif in_dns:
+                dns.extend(addresses)
+            elif ('ip address' in key or 'dirección ip' in key) and addresses:
+                state['ip'] = addresses[0]
+            elif ('mask' in value.lower() or 'máscara' in value.lower()) and len(addresses) >= 2:
+                state['prefix'] = mask_to_prefix(addresses[-1])
+            elif ('gateway' in key or 'puerta de enlace' in key) and addresses:
+                state['gateway'] = addresses[0]
+        state['dns'] = dns
+        return state
+
+    def _apply_steps(self, plan):
+        interface = check_interface_name(plan['interface'])
+        changes = plan['changes']
+        commands = []
+        if changes.get('method') == 'auto':
+            commands.append(f'interface ip set address name="{interface}" source=dhcp')
+        elif 'address' in changes or 'gateway' in changes:
+            # netsh fija dirección y puerta de enlace en el mismo comando
+            ip, prefix = plan['address']
+            gateway = plan['gateway'] or ''
+            commands.append(f'interface ip set address name="{interface}" static {ip} {prefix_to_mask(prefix)} {gateway}'.rstrip())
+        if 'dns' in changes:
+            # validate=no evita que netsh espere a comprobar cada servidor
+            dns = changes['dns']
+            commands.append(f'interface ip set dns name="{interface}" static {dns[0]} validate=no')
+            for index, server in enumerate(dns[1:], start=2):
+                commands.append(f'interface ip add dns name="{interface}" {server} index={index} validate=no')
+        yield from self._script_steps(commands)
+
+    def _restore_dhcp_steps(self, interface):
+        check_interface_name(interface)
+        yield from self._script_steps([
+            f'interface ip set address name="{interface}" source=dhcp',
+            f'interface ip set dns name="{interface}" source=dhcp'
+        ])
+
+
+class KernelBackend(NetworkBackend):
+    """
+    Base de los backends que cambian el kernel directamente (Linux).
+
+    No hay gestor de red de por medio: no se maneja DHCP ni DNS, los
+    cambios no sobreviven a un reinicio y no hace falta reconectar.
+    """
+
+    supports_dns = False
+    kernel = True
+
+    def _apply_steps(self, plan):
+        changes = plan['changes']
+        if changes.get('method') == 'auto':
+            raise NotImplementedError(f'El backend {self.name} no maneja DHCP')
+        if 'address' in changes or 'gateway' in changes:
+            ip, prefix = plan['address']
+            yield from self._set_address_steps(plan['interface'], ip, prefix, plan['gateway'] or None)
+
+    def _restore_dhcp_steps(self, interface):
+        raise NotImplementedError(f'El backend {self.name} no maneja DHCP')
+
+
+class Iproute2Backend(KernelBackend):
+    """Comandos 'ip' de iproute2"""
+
+    name = 'iproute2'
+
+    def _get_state_steps(self, interface):
+        state = empty_state()
+        output = yield ['ip', '-4', '-o', 'addr', 'show', 'dev', interface], True
+        match = re.search(r'inet (\S+)/(\d+)', output)
+        state['method'] = 'manual'
+        state['ip'], state['prefix'] = (match.group(1), int(match.group(2))) if match else ('', None)
+        routes = yield ['ip', '-4', 'route', 'show', 'default', 'dev', interface], True
+        gateway = IPV4_RE.search(routes)
+        state['gateway'] = gateway.group(0) if gateway else ''
+        return state
+
+    def _set_address_steps(self, interface, ip, prefix, gateway=None):
+        yield ['ip', '-4', 'addr', 'flush', 'dev', interface], False
+        yield ['ip', 'addr', 'add', f'{ip}/{prefix}', 'dev', interface], False
+        yield ['ip', 'link', 'set', interface, 'up'], False
+        if gateway:
+            yield ['ip', 'route', 'replace', 'default', 'via', gateway, 'dev', interface], False
+
+    def _set_link_steps(self, interface, up):
+        yield ['ip', 'link', 'set', interface, 'up' if up else 'down'], False
+
+
+class NetlinkBackend(KernelBackend):
+    """
+    rtnetlink en Python puro (ver netlink.py); cada cambio es un solo lote.
+
+    No lanza procesos: sus pasos hablan con el kernel directamente y
+    terminan en menos de un milisegundo, así que no ceden el control.
+    """
+
+    name = 'netlink'
+
+    def _get_state_steps(self, interface):
+        state = empty_state()
+        with netlink.NetlinkSocket() as nl:
+            addresses = nl.get_addresses(interface)
+            gateway = nl.get_default_gateway(interface)
+        state['method'] = 'manual'
+        state['ip'], state['prefix'] = (addresses[0][1], addresses[0][2]) if addresses else ('', None)
+        state['gateway'] = gateway or ''
+        return state
+        yield  # Generador sin pasos
+
+    def _set_address_steps(self, interface, ip, prefix, gateway=None):
+        netlink.set_ipv4_config(interface, ip, prefix, gateway)
+        return
+        yield  # Generador sin pasos
+
+    def _set_link_steps(self, interface, up):
+        with netlink.NetlinkSocket() as nl:
+            nl.set_link(interface, up)
+        return
+        yield  # Generador sin pasos
+
+
+class FakeBackend(NetworkBackend):
+    """
+    Backend simulado en memoria, para pruebas de carga y de la interfaz.
+
+    Guarda el estado de cada interfaz en un dict y simula la demora de cada
+    operación con `latency` (segundos por operación: 'get_state', 'apply',
+    'reconnect', 'restore_dhcp', 'set_address', 'set_link'). Con demoras
+    en cero soporta miles de operaciones por segundo; `calls` cuenta las
+    operaciones hechas. No requiere privilegios ni interfaces reales.
+    """
+
+    name = 'fake'
+    requires_admin = False
+    kernel = True
+
+    def __init__(self, interfaces: Optional[Dict[str, Dict]] = None,
+                 latency: Optional[Dict[str, float]] = None):
+        if interfaces is None:
+            interfaces = {'eth0': {}, 'wlan0': {}}
+        self.interfaces = {}
+        for name, state in interfaces.items():
+            base = {'method': 'auto', 'ip': '', 'prefix': None, 'gateway': '', 'dns': [], 'up': True}
+            base.update(state)
+            self.interfaces[name] = base
+        self.latency = dict(latency or {})
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def _operation(self, name):
+        """Cuenta la operación y devuelve su demora simulada"""
+        with self._lock:
+            self.calls[name] += 1
+        return self.latency.get(name, 0.0)
+
+    def _interface(self, interface):
+        try:
+            return self.interfaces[interface]
+        except KeyError:
+            raise ValueError(f'No existe la interfaz {interface}')
+
+    def _get_state_steps(self, interface):
+        yield self._operation('get_state')
+        with self._lock:
+            state = self._interface(interface)
+            return {key: (list(value) if key == 'dns' else value)
+                    for key, value in state.items() if key != 'up'}
+
+    def _apply_steps(self, plan):
+        yield self._operation('apply')
+        if plan['reconnect']:
+            yield self._operation('reconnect')
+        changes = plan['changes']
+        with self._lock:
+            state = self._interface(plan['interface'])
+            if 'method' in changes:
+                state['method'] = changes['method']
+            if 'address' in changes:
+                state['ip'], state['prefix'] = changes['address']
+            if 'gateway' in changes:
+                state['gateway'] = changes['gateway']
+            if 'dns' in changes:
+                state['dns'] = list(changes['dns'])
+
+    def _restore_dhcp_steps(self, interface):
+        yield self._operation('restore_dhcp')
+        with self._lock:
+            self._interface(interface)['method'] = 'auto'
+
+    def _set_address_steps(self, interface, ip, prefix, gateway=None):
+        yield self._operation('set_address')
+        with self._lock:
+            state = self._interface(interface)
+            state.update(method='manual', ip=ip, prefix=prefix, up=True)
+            if gateway:
+                state['gateway'] = gateway
+
+    def _set_link_steps(self, interface, up):
+        yield self._operation('set_link')
+        with self._lock:
+            self._interface(interface)['up'] = bool(up)
+
+    def list_interfaces(self):
+        with self._lock:
+            return [name for name, state in self.interfaces.items() if state['up']]
+
+
+BACKENDS = {
+    'nmcli': NmcliBackend,
+    'netsh': NetshBackend,
+    'iproute2': Iproute2Backend,
+    'netlink': NetlinkBackend,
+    'fake': FakeBackend,
+}
+
+def create_backend(name: Optional[str] = None, system: Optional[str] = None) -> NetworkBackend:
+    """
+    Crea un backend por nombre.
+
+    Sin nombre se usa la variable de entorno GIP_NETWORK_BACKEND y, si no
+    está, el del sistema: netsh en Windows y nmcli en Linux.
+    """
+    name = name or os.environ.get(BACKEND_ENV)
+    if not name:
+        name = {'Windows': 'netsh', 'Linux': 'nmcli'}.get(system)
+    if name is None:
+        return NetworkBackend()
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f'Backend de red desconocido: {name}')
+
+def kernel_backend() -> NetworkBackend:
+    """Backend para cambios directos en el kernel: netlink si está disponible, si no iproute2"""
+    return NetlinkBackend() if netlink.is_available() else Iproute2Backend()
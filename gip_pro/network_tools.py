@@ -1,12 +1,29 @@
 # Lógica de cambio IP, DNS, diagnóstico, etc.
+import asyncio
 import platform
 import subprocess
 import os
+import time
+
+from . import dns_benchmark, dns_resolver, host_sweep, icmp
+from .network_backends import (
+    NetworkBackend, create_backend, empty_state, kernel_backend, mask_to_prefix
+)
 
 class NetworkTools:
-    def __init__(self, logger=None):
+    def __init__(self, logger=None, backend=None):
+        """
+        Args:
+            logger: NetworkLogger donde registrar las operaciones
+            backend: NetworkBackend o nombre de backend ('nmcli', 'netsh',
+                'iproute2', 'netlink', 'fake'); por defecto el del sistema
+        """
         self.logger = logger
         self.system = platform.system()
+        if backend is None or isinstance(backend, str):
+            backend = create_backend(backend, self.system)
+        self.backend: NetworkBackend = backend
+        self._resolver = None
     
     def is_admin(self):
         if self.system == 'Windows':
@@ -25,58 +42,167 @@ class NetworkTools:
             except Exception:
                 return False
 
+    def _require_admin(self, backend, message):
+        """Exige privilegios solo si el backend toca la configuración real"""
+        if backend.requires_admin and not self.is_admin():
+            raise PermissionError(message)
+
     def change_ip(self, interface, ip, mask, gateway):
-        if not self.is_admin():
-            raise PermissionError('Se requieren privilegios de administrador para cambiar la IP.')
+        self._require_admin(self.backend, 'Se requieren privilegios de administrador para cambiar la IP.')
             
-        if self.system == 'Windows':
-            cmd = f'netsh interface ip set address name="{interface}" static {ip} {mask if mask else "255.255.255.0"} {gateway if gateway else ""}'
-            subprocess.run(cmd, shell=True, check=True)
-        elif self.system == 'Linux':
-            cmd = f'nmcli con mod "{interface}" ipv4.addresses {ip}/{mask if mask else "24"}'
-            subprocess.run(cmd, shell=True, check=True)
-            if gateway:
-                subprocess.run(f'nmcli con mod "{interface}" ipv4.gateway {gateway}', shell=True, check=True)
-            subprocess.run(f'nmcli con mod "{interface}" ipv4.method manual', shell=True, check=True)
-            subprocess.run(f'nmcli con up "{interface}"', shell=True, check=True)
-        else:
-            raise NotImplementedError('Solo implementado para Windows y Linux')
+        plan = self.apply_profile({'interface': interface, 'ip': ip, 'mask': mask, 'gateway': gateway}, log=False)
         
         if self.logger:
-            self.logger.log_event('change_ip', {'interface': interface, 'ip': ip, 'mask': mask, 'gateway': gateway})
+            self.logger.log_event('change_ip', {'interface': interface, 'ip': ip, 'mask': mask, 'gateway': gateway,
+                                                'changes': len(plan['changes'])})
+
+    def _kernel_backend(self):
+        """El backend actual si cambia el kernel directamente; si no, netlink o iproute2"""
+        if self.backend.kernel:
+            return self.backend
+        if self.system != 'Linux':
+            raise NotImplementedError('Solo implementado para Linux')
+        return kernel_backend()
+
+    def set_interface_address(self, interface, ip, mask, gateway=None):
+        """
+        Cambia la dirección IPv4 directamente en el kernel (Linux), sin
+        NetworkManager: deja solo esa dirección, activa el enlace y fija la
+        ruta por defecto.
+
+        Usa netlink en un solo lote cuando está disponible y, si no, los
+        comandos de iproute2.
+        """
+        backend = self._kernel_backend()
+        self._require_admin(backend, 'Se requieren privilegios de administrador para cambiar la IP.')
+        backend.set_address(interface, ip, mask_to_prefix(mask), gateway or None)
+
+        if self.logger:
+            self.logger.log_event('change_ip', {'interface': interface, 'ip': ip, 'mask': mask,
+                                                'gateway': gateway, 'backend': backend.name})
+
+    def set_link_state(self, interface, up=True):
+        """Activa o desactiva una interfaz en el kernel (Linux)"""
+        backend = self._kernel_backend()
+        self._require_admin(backend, 'Se requieren privilegios de administrador para cambiar la interfaz.')
+        backend.set_link(interface, up)
+
+    def get_interface_state(self, interface):
+        """
+        Lee la configuración IPv4 actual de una interfaz (conexión en Linux).
+
+        Returns:
+            dict con method ('auto' o 'manual'), ip, prefix, gateway y dns
+            (lista). Los valores que no se pudieron leer quedan en None, y el
+            planificador los trata como distintos.
+        """
+        try:
+            return self.backend.get_state(interface)
+        except Exception:
+            return empty_state()
+
+    def plan_profile(self, profile, state=None):
+        """
+        Compara un perfil con la configuración actual y calcula qué cambiar.
+
+        Los campos vacíos o ausentes del perfil se dejan como están, salvo
+        'ip' vacía, que significa DHCP.
+
+        Args:
+            profile: dict con interface, ip, mask, gateway, dns1, dns2
+            state: configuración actual (por defecto, get_interface_state)
+
+        Returns:
+            dict con interface, changes (method, address, gateway o dns que
+            hay que aplicar), reconnect (si hace falta reactivar la conexión)
+            y address y gateway (lo pedido, aunque no cambie)
+
+        Raises:
+            NotImplementedError: Si el perfil cambia los DNS y el backend no
+                puede aplicarlos (iproute2, netlink); no se aplica nada
+        """
+        interface = profile['interface']
+        if state is None:
+            state = self.get_interface_state(interface)
+        changes = {}
+        address = None
+        gateway = None
+
+        if 'ip' in profile:
+            ip = profile.get('ip') or ''
+            if not ip:
+                if state['method'] != 'auto':
+                    changes['method'] = 'auto'
+            else:
+                prefix = mask_to_prefix(profile.get('mask'))
+                address = (ip, prefix)
+                if state['method'] != 'manual':
+                    changes['method'] = 'manual'
+                if (state['ip'], state['prefix']) != (ip, prefix) or 'method' in changes:
+                    changes['address'] = address
+                gateway = profile.get('gateway') or state['gateway'] or ''
+                if gateway and gateway != state['gateway']:
+                    changes['gateway'] = gateway
+
+        dns = [d for d in (profile.get('dns1'), profile.get('dns2')) if d]
+        if dns and dns != state['dns']:
+            if not self.backend.supports_dns:
+                raise NotImplementedError(f'El backend {self.backend.name} no aplica cambios de DNS')
+            changes['dns'] = dns
+
+        # Dirección, puerta de enlace y método solo se aplican reactivando la
+        # conexión; los DNS se aplican en caliente
+        reconnect = bool(changes.keys() & {'method', 'address', 'gateway'})
+        return {'interface': interface, 'changes': changes, 'reconnect': reconnect,
+                'address': address, 'gateway': gateway}
+
+    def apply_profile(self, profile, log=True):
+        """
+        Aplica un perfil ejecutando solo los comandos que hacen falta.
+
+        Si la configuración actual ya coincide no se ejecuta nada, y si solo
+        cambian los DNS no se reconecta la interfaz.
+
+        Returns:
+            El plan aplicado (ver plan_profile)
+
+        Raises:
+            NotImplementedError: Si pide DNS que el backend no aplica
+        """
+        self._require_admin(self.backend, 'Se requieren privilegios de administrador para aplicar el perfil.')
+
+        plan = self.plan_profile(profile)
+        if plan['changes']:
+            self.backend.apply(plan)
+
+        if self.logger and log:
+            self.logger.log_event('apply_profile', {
+                'interface': plan['interface'],
+                'changes': ','.join(plan['changes']) or 'none',
+                'reconnect': plan['reconnect']
+            })
+        return plan
 
     def set_dns(self, interface, dns1, dns2=None):
-        if not self.is_admin():
-            raise PermissionError('Se requieren privilegios de administrador para cambiar DNS.')
+        """
+        Cambia los DNS de la interfaz sin reconectarla.
+
+        Raises:
+            NotImplementedError: Si el backend no aplica cambios de DNS; en
+                ese caso no se registra el evento
+        """
+        self._require_admin(self.backend, 'Se requieren privilegios de administrador para cambiar DNS.')
             
-        if self.system == 'Windows':
-            subprocess.run(f'netsh interface ip set dns name="{interface}" static {dns1}', shell=True, check=True)
-            if dns2:
-                subprocess.run(f'netsh interface ip add dns name="{interface}" {dns2} index=2', shell=True, check=True)
-        elif self.system == 'Linux':
-            dns = dns1
-            if dns2:
-                dns += f',{dns2}'
-            subprocess.run(f'nmcli con mod "{interface}" ipv4.dns "{dns}"', shell=True, check=True)
-            subprocess.run(f'nmcli con up "{interface}"', shell=True, check=True)
-        else:
-            raise NotImplementedError('Solo implementado para Windows y Linux')
+        # Solo DNS: el planificador no reconecta la interfaz
+        self.apply_profile({'interface': interface, 'dns1': dns1, 'dns2': dns2}, log=False)
             
         if self.logger:
             self.logger.log_event('set_dns', {'interface': interface, 'dns1': dns1, 'dns2': dns2})
 
     def restore_dhcp(self, interface):
-        if not self.is_admin():
-            raise PermissionError('Se requieren privilegios de administrador para restaurar DHCP.')
+        self._require_admin(self.backend, 'Se requieren privilegios de administrador para restaurar DHCP.')
             
-        if self.system == 'Windows':
-            subprocess.run(f'netsh interface ip set address name="{interface}" source=dhcp', shell=True, check=True)
-            subprocess.run(f'netsh interface ip set dns name="{interface}" source=dhcp', shell=True, check=True)
-        elif self.system == 'Linux':
-            subprocess.run(f'nmcli con mod "{interface}" ipv4.method auto', shell=True, check=True)
-            subprocess.run(f'nmcli con up "{interface}"', shell=True, check=True)
-        else:
-            raise NotImplementedError('Solo implementado para Windows y Linux')
+        self.backend.restore_dhcp(interface)
             
         if self.logger:
             self.logger.log_event('restore_dhcp', {'interface': interface})
@@ -86,8 +212,7 @@ class NetworkTools:
             raise PermissionError('Se requieren privilegios de administrador para configurar el proxy.')
             
         if self.system == 'Windows':
-            cmd = f'netsh winhttp set proxy {proxy_address}:{proxy_port}'
-            subprocess.run(cmd, shell=True)
+            subprocess.run(['netsh', 'winhttp', 'set', 'proxy', f'{proxy_address}:{proxy_port}'])
         elif self.system == 'Linux':
             os.environ['http_proxy'] = f'http://{proxy_address}:{proxy_port}'
             os.environ['https_proxy'] = f'https://{proxy_address}:{proxy_port}'
@@ -120,27 +245,173 @@ class NetworkTools:
             return self.system
 
     def ping_test(self, target, count=4):
-        """Realiza una prueba de ping al destino especificado."""
+        """
+        Realiza una prueba de ping al destino especificado.
+
+        Usa el motor ICMP nativo (icmp.py) y, si no está disponible (sin
+        permisos para sockets ICMP, o en Windows), el comando `ping`.
+
+        Returns:
+            (éxito, texto del resultado)
+        """
         try:
-            if self.system == 'Windows':
-                command = f'ping -n {count} {target}'
-            else:
-                command = f'ping -c {count} {target}'
-            
-            result = subprocess.run(command, shell=True, capture_output=True, text=True)
-            success = result.returncode == 0
-            
+            try:
+                result = self.ping_hosts([target], count=count)[0]
+            except icmp.ICMPUnavailableError:
+                return self._ping_command(target, count)
+            success = result['received'] > 0
+
             if self.logger:
-                self.logger.log_event('ping_test', {'target': target, 'success': success})
-            
-            return success, result.stdout
+                self.logger.log_event('ping_test', lambda: {'target': target, 'success': success,
+                                                            'loss': result['loss'], 'avg_ms': result['avg']},
+                                      level='debug')
+
+            return success, icmp.format_result(result)
         except Exception as e:
             if self.logger:
                 self.logger.log_error('ping_test', str(e))
             return False, str(e)
 
+    def _ping_command(self, target, count):
+        """ping_test con el comando del sistema (sin sockets ICMP)"""
+        if self.system == 'Windows':
+            command = ['ping', '-n', str(count), target]
+        else:
+            command = ['ping', '-c', str(count), target]
+
+        result = subprocess.run(command, capture_output=True, text=True)
+        success = result.returncode == 0
+
+        if self.logger:
+            self.logger.log_event('ping_test', lambda: {'target': target, 'success': success}, level='debug')
+
+        return success, result.stdout
+
+    def ping_hosts(self, targets, count=1, timeout=icmp.DEFAULT_TIMEOUT, interval=icmp.DEFAULT_INTERVAL):
+        """
+        Hace ping a muchos destinos a la vez con el motor ICMP nativo, para
+        comprobaciones de salud en bloque.
+
+        Returns:
+            Lista de resultados en el orden de `targets` (ver Pinger.ping)
+
+        Raises:
+            icmp.ICMPUnavailableError si no se puede hacer ping nativo
+            (sin permisos para sockets ICMP, o en Windows)
+        """
+        return asyncio.run(icmp.ping_many(list(targets), count, timeout, interval))
+
+    def sweep(self, cidr, callback=None, **options):
+        """
+        Descubre los hosts vivos de una subred (hasta una /16) con ping
+        nativo y conexiones TCP, con concurrencia adaptada a las pérdidas.
+
+        Los hosts vivos recientes se toman de la caché de la subred
+        (data/sweeps) y solo se sondean los demás.
+
+        Args:
+            cidr: subred, p. ej. '192.168.1.0/24'
+            callback: función llamada con cada resultado según llega
+            options: ver host_sweep.sweep (ports, timeout, retries, max_age...)
+
+        Returns:
+            Hosts vivos ordenados por dirección
+
+        Raises:
+            ValueError si la subred no es IPv4 válida o es mayor que /16
+        """
+        start = time.monotonic()
+        alive = asyncio.run(host_sweep.sweep_all(cidr, callback, **options))
+
+        if self.logger:
+            self.logger.log_event('sweep', {'cidr': cidr, 'alive': len(alive),
+                                            'duration_s': round(time.monotonic() - start, 1)})
+        return alive
+
+    @property
+    def resolver(self):
+        """Resolvedor DNS con los servidores del sistema; su caché dura lo que esta instancia"""
+        if self._resolver is None:
+            self._resolver = dns_resolver.Resolver()
+        return self._resolver
+
+    def dns_lookup(self, domain, record_type='A'):
+        """
+        Consulta DNS con el resolvedor propio (caché por TTL).
+
+        Returns:
+            (éxito, texto del resultado); éxito es False si no hubo
+            respuesta o el dominio no existe
+        """
+        try:
+            result = asyncio.run(self.resolver.query(domain, record_type))
+            success = result['error'] is None and result['rcode'] == 'NOERROR'
+
+            if self.logger:
+                self.logger.log_event('dns_lookup', lambda: {'domain': domain, 'type': record_type,
+                                                             'rcode': result['rcode'], 'cached': result['cached'],
+                                                             'latency_ms': result['latency_ms']},
+                                      level='debug')
+
+            return success, dns_resolver.format_result(result)
+        except Exception as e:
+            if self.logger:
+                self.logger.log_error('dns_lookup', str(e))
+            return False, str(e)
+
+    def dns_lookup_many(self, domains, record_type='A'):
+        """
+        Resuelve muchos nombres a la vez.
+
+        Returns:
+            Lista de resultados en el orden de `domains` (ver Resolver.query)
+        """
+        return asyncio.run(self.resolver.query_many(list(domains), record_type))
+
+    def benchmark_dns(self, presets=None, domains=None, rounds=3, timeout=2.0, apply_to=None,
+                      results_path=dns_benchmark.DNS_BENCHMARK_PATH):
+        """
+        Mide la latencia (p50/p95/p99) y la tasa de fallos de todos los
+        presets de DNS a la vez y guarda el resultado en data/dns_benchmark.json.
+
+        Args:
+            presets: {clave: {'name', 'primary', 'secondary'}}; por defecto
+                los de data/dns_presets.json
+            domains: dominios a consultar (dns_benchmark.DEFAULT_DOMAINS)
+            rounds: veces que se consulta cada dominio
+            timeout: espera por consulta (segundos)
+            apply_to: interfaz a la que aplicar el preset ganador (opcional)
+
+        Returns:
+            Resultados ordenados de mejor a peor (ver dns_benchmark.benchmark)
+
+        Raises:
+            NotImplementedError: Si se pide `apply_to` y el backend no aplica
+                cambios de DNS (se comprueba antes de medir)
+        """
+        if apply_to and not self.backend.supports_dns:
+            raise NotImplementedError(f'El backend {self.backend.name} no aplica cambios de DNS')
+        results = asyncio.run(dns_benchmark.benchmark(presets, domains, rounds, timeout))
+        dns_benchmark.save_results(results, results_path)
+
+        if self.logger:
+            self.logger.log_event('dns_benchmark', {
+                'ranking': ','.join(result['preset'] for result in results),
+                'best_p50_ms': results[0]['p50'] if results else None
+            })
+
+        if apply_to and results and results[0]['p50'] is not None:
+            best = results[0]
+            primary, secondary = (dns_benchmark.parse_server(server)[0] if server else None
+                                  for server in (best['primary'], best['secondary']))
+            self.set_dns(apply_to, primary, secondary)
+        return results
+
     def get_active_interfaces(self):
         """Obtiene la lista de interfaces de red activas."""
+        interfaces = self.backend.list_interfaces()
+        if interfaces is not None:
+            return interfaces
         try:
             import netifaces
             interfaces = []
@@ -154,7 +425,7 @@ class NetworkTools:
         except ImportError:
             if self.system == 'Windows':
                 try:
-                    output = subprocess.check_output('netsh interface show interface', shell=True, text=True)
+                    output = subprocess.check_output(['netsh', 'interface', 'show', 'interface'], text=True)
                     interfaces = []
                     for line in output.split('\n'):
                         if 'Enabled' in line:
@@ -165,7 +436,7 @@ class NetworkTools:
                     return ["Ethernet", "Wi-Fi"]
             else:
                 try:
-                    output = subprocess.check_output('ip link show', shell=True, text=True)
+                    output = subprocess.check_output(['ip', 'link', 'show'], text=True)
                     interfaces = []
                     for line in output.split('\n'):
                         if ':' in line and 'lo:' not in line:
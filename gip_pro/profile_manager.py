@@ -1,37 +1,278 @@
 # Gestión de perfiles de red (guardar/cargar)
 
+import bisect
+import csv
+import hashlib
+import ipaddress
 import json
 import os
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .validator import validate_dns, validate_ip, validate_mask
 
 PROFILE_PATH = os.path.join(os.path.dirname(__file__), 'data', 'profiles.json')
 
+# Campos que definen la configuración de red de un perfil
+NETWORK_FIELDS = ('interface', 'ip', 'mask', 'gateway', 'dns1', 'dns2')
+
+def profile_hash(profile: Dict) -> str:
+    """
+    Hash canónico de los campos de red de un perfil
+    
+    Ignora nombre, ID, fechas y espacios sobrantes, así que dos perfiles
+    con la misma configuración de red tienen el mismo hash.
+    """
+    values = [str(profile.get(field) or '').strip() for field in NETWORK_FIELDS]
+    return hashlib.sha1('\x1f'.join(values).encode('utf-8')).hexdigest()
+
+# Columnas de los archivos CSV de importación/exportación
+CSV_FIELDS = ('id', 'name') + NETWORK_FIELDS + ('created_at',)
+
+def validate_profile(profile: Dict) -> Optional[str]:
+    """
+    Valida los campos de red de un perfil
+    
+    Returns:
+        str o None: Descripción del primer error, o None si es válido
+    """
+    if not profile.get('interface'):
+        return "Falta la interfaz"
+    ip = profile.get('ip')
+    if ip:
+        if not validate_ip(ip):
+            return f"IP inválida: {ip}"
+        if not validate_mask(profile.get('mask') or ''):
+            return f"Máscara inválida: {profile.get('mask')}"
+    if profile.get('gateway') and not validate_ip(profile['gateway']):
+        return f"Gateway inválido: {profile['gateway']}"
+    for field in ('dns1', 'dns2'):
+        if profile.get(field) and not validate_dns(profile[field]):
+            return f"DNS inválido: {profile[field]}"
+    return None
+
+def _file_format(path: str, file_format: Optional[str]) -> str:
+    """Formato indicado o, si no, el que corresponde a la extensión"""
+    if file_format:
+        return file_format.lower()
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
 class ProfileManager:
-    def __init__(self):
-        self.profiles: List[Dict] = []
+    """
+    Perfiles de red persistidos como instantánea más diario.
+
+    profiles.json es la instantánea completa; cada alta, baja o cambio se
+    agrega como una línea JSON al diario (profiles.journal) en lugar de
+    reescribir la instantánea. Al cargar se aplica el diario sobre la
+    instantánea, y cada `journal_compact_ops` operaciones el diario se
+    compacta en una instantánea nueva.
+    """
+
+    journal_compact_ops = 500  # Operaciones en el diario que disparan la compactación
+
+    def __init__(self, profile_path: Optional[str] = None):
+        self.profile_path = profile_path or PROFILE_PATH
+        self.journal_path = os.path.splitext(self.profile_path)[0] + '.journal'
+        self._journal_ops = 0  # Operaciones en el diario desde la última instantánea
+        self.profiles: Dict[int, Dict] = {}  # id -> perfil, en orden de creación
+        self.next_id = 0  # Los IDs nunca se reutilizan, aunque se borren perfiles
+        # Índices secundarios: valor -> {id: perfil}
+        self._by_name: Dict[str, Dict[int, Dict]] = {}
+        self._by_interface: Dict[str, Dict[int, Dict]] = {}
+        self._by_hash: Dict[str, Dict[int, Dict]] = {}
+        # Índices ordenados para búsquedas; se reconstruyen al consultar
+        # después de un cambio (ver _ensure_search_index)
+        self._search_dirty = True
+        self._name_keys: List[str] = []  # Nombres en minúsculas, ordenados
+        self._name_ids: List[int] = []
+        self._address_keys: List[int] = []  # IPs como enteros, ordenadas
+        self._address_ids: List[int] = []
         self.load_profiles()
 
     def load_profiles(self) -> None:
-        """Carga los perfiles desde el archivo"""
+        """
+        Carga los perfiles desde la instantánea y aplica el diario
+
+        Los perfiles antiguos sin ID (o con un ID repetido) reciben uno nuevo
+        y los que no tienen nombre reciben el generado; en ese caso, o si el
+        diario tenía operaciones, se guarda una instantánea nueva.
+        """
+        self.profiles = {}
+        self._by_name = {}
+        self._by_interface = {}
+        self._by_hash = {}
+        self.next_id = 0
+        self._journal_ops = 0
+        migrated = False
         try:
-            if os.path.exists(PROFILE_PATH):
-                with open(PROFILE_PATH, 'r', encoding='utf-8') as f:
+            if os.path.exists(self.profile_path):
+                with open(self.profile_path, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    self.profiles = data.get('profiles', [])
+                profiles = data.get('profiles', [])
+                self.next_id = max([data.get('next_id', 0)] +
+                                   [p['id'] + 1 for p in profiles if isinstance(p.get('id'), int)])
+                for profile in profiles:
+                    profile_id = profile.get('id')
+                    if not isinstance(profile_id, int) or profile_id in self.profiles:
+                        profile['id'] = self.next_id
+                        self.next_id += 1
+                        migrated = True
+                    if not profile.get('name'):
+                        profile['name'] = self.generate_profile_name(profile)
+                        migrated = True
+                    self._index(profile)
         except Exception as e:
             print(f"Error al cargar perfiles: {str(e)}")
-            self.profiles = []
+            self.profiles = {}
+            self._by_name = {}
+            self._by_interface = {}
+            self._by_hash = {}
+            return
+        # Con la instantánea ya cargada, un fallo del diario nunca deja el
+        # gestor vacío (una compactación posterior borraría profiles.json)
+        try:
+            replayed, skipped = self._replay_journal()
+            # Si se descartaron líneas se compacta: la siguiente operación no
+            # debe quedar pegada a una línea cortada
+            if migrated or replayed or skipped:
+                self.save_profiles()
+        except Exception as e:
+            print(f"Error al aplicar el diario de perfiles: {str(e)}")
+
+    def _replay_journal(self) -> Tuple[int, int]:
+        """
+        Aplica las operaciones del diario sobre los perfiles cargados
+
+        Aplicar una operación dos veces deja el mismo resultado, así que no
+        importa si el diario se compactó a medias. Las líneas que no son
+        JSON (una última línea cortada por un cierre abrupto) o que no son
+        una operación completa se descartan.
+
+        Returns:
+            Tuple[int, int]: Operaciones aplicadas y líneas descartadas
+        """
+        if not os.path.exists(self.journal_path):
+            return 0, 0
+        applied = 0
+        skipped = 0
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    op = json.loads(line)
+                except ValueError:
+                    skipped += 1
+                    continue
+                kind = op.get('op') if isinstance(op, dict) else None
+                profile = op.get('profile') if kind in ('add', 'update') else None
+                if isinstance(profile, dict) and isinstance(profile.get('id'), int):
+                    self._replace(profile)
+                    self.next_id = max(self.next_id, profile['id'] + 1)
+                elif kind == 'delete' and isinstance(op.get('id'), int):
+                    self._unindex(op['id'])
+                else:
+                    skipped += 1
+                    continue
+                applied += 1
+        return applied, skipped
+
+    def _write_journal(self, ops: List[Dict]) -> None:
+        """Agrega varias operaciones al diario con una sola escritura"""
+        os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(op, ensure_ascii=False) + '\n' for op in ops))
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_ops += len(ops)
+
+    def _append_journal(self, op: Dict) -> None:
+        """Agrega una operación al diario y compacta si ya tiene demasiadas"""
+        self._write_journal([op])
+        if self._journal_ops >= self.journal_compact_ops:
+            self.save_profiles()
 
     def save_profiles(self) -> None:
-        """Guarda los perfiles en el archivo"""
+        """
+        Guarda una instantánea completa y vacía el diario
+
+        La instantánea se escribe en un archivo temporal que luego reemplaza
+        a profiles.json, así que un corte nunca deja el archivo truncado.
+        """
         try:
-            os.makedirs(os.path.dirname(PROFILE_PATH), exist_ok=True)
-            with open(PROFILE_PATH, 'w', encoding='utf-8') as f:
-                json.dump({'profiles': self.profiles}, f, indent=2, ensure_ascii=False)
+            os.makedirs(os.path.dirname(self.profile_path), exist_ok=True)
+            tmp_path = self.profile_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                # Un perfil por línea: legible y mucho más rápido que indent=2
+                f.write('{"next_id": %d, "profiles": [\n' % self.next_id)
+                f.write(',\n'.join(json.dumps(profile, ensure_ascii=False)
+                                   for profile in self.profiles.values()))
+                f.write('\n]}\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.profile_path)
+            # Si el proceso muere antes de esto, el diario se vuelve a
+            # aplicar al cargar sin cambiar el resultado
+            if os.path.exists(self.journal_path):
+                os.truncate(self.journal_path, 0)
+            self._journal_ops = 0
         except Exception as e:
             print(f"Error al guardar perfiles: {str(e)}")
 
+    def _index(self, profile: Dict, digest: Optional[str] = None) -> None:
+        """Agrega el perfil al diccionario principal y a los índices"""
+        profile_id = profile['id']
+        self.profiles[profile_id] = profile
+        self._by_name.setdefault(profile.get('name', ''), {})[profile_id] = profile
+        self._by_interface.setdefault(profile.get('interface', ''), {})[profile_id] = profile
+        self._by_hash.setdefault(digest or profile_hash(profile), {})[profile_id] = profile
+        self._search_dirty = True
+
+    def _replace(self, profile: Dict) -> None:
+        """
+        Reemplaza un perfil (o lo agrega si no existe) sin moverlo de su
+        lugar en el orden de creación, ni en el diccionario principal ni en
+        los índices
+        """
+        profile_id = profile['id']
+        old = self.profiles.get(profile_id)
+        if old is None:
+            self._index(profile)
+            return
+        self.profiles[profile_id] = profile
+        self._search_dirty = True
+        for index, old_key, new_key in ((self._by_name, old.get('name', ''), profile.get('name', '')),
+                                        (self._by_interface, old.get('interface', ''), profile.get('interface', '')),
+                                        (self._by_hash, profile_hash(old), profile_hash(profile))):
+            if old_key != new_key:
+                bucket = index.get(old_key)
+                if bucket is not None:
+                    bucket.pop(profile_id, None)
+                    if not bucket:
+                        del index[old_key]
+            bucket = index.setdefault(new_key, {})
+            bucket[profile_id] = profile
+            # Los IDs crecen con la creación: si pasó a otro grupo detrás de
+            # perfiles más nuevos, el grupo se reordena por ID
+            if old_key != new_key and any(other > profile_id for other in bucket):
+                index[new_key] = dict(sorted(bucket.items()))
+
+    def _unindex(self, profile_id: int) -> Optional[Dict]:
+        """Quita el perfil del diccionario principal y de los índices"""
+        profile = self.profiles.pop(profile_id, None)
+        if profile is None:
+            return None
+        self._search_dirty = True
+        for index, key in ((self._by_name, profile.get('name', '')),
+                           (self._by_interface, profile.get('interface', '')),
+                           (self._by_hash, profile_hash(profile))):
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(profile_id, None)
+                if not bucket:
+                    del index[key]
+        return profile
+
     def add_profile(self, profile: Dict) -> bool:
         """
         Agrega un nuevo perfil
@@ -40,19 +281,69 @@ class ProfileManager:
             profile: Diccionario con los datos del perfil
             
         Returns:
-            bool: True si se agregó correctamente
+            bool: True si se agregó correctamente o si ya existía uno igual
+        """
+        return self.save_profile(profile) is not None
+
+    def save_profile(self, profile: Dict) -> Optional[Dict]:
+        """
+        Guarda un perfil, sin duplicar configuraciones ya guardadas
+        
+        Args:
+            profile: Diccionario con los datos del perfil
+            
+        Returns:
+            Dict o None: El perfil guardado o, si ya había uno con los mismos
+            campos de red, ese perfil existente; None si hubo un error
         """
         try:
+            existing = self.find_duplicate(profile)
+            if existing is not None:
+                return existing
+
             # Agregar campos adicionales
             profile['created_at'] = datetime.now().isoformat()
-            profile['id'] = len(self.profiles)
+            profile['id'] = self.next_id
             profile['name'] = self.generate_profile_name(profile)
             
-            self.profiles.append(profile)
-            self.save_profiles()
-            return True
+            self.next_id += 1
+            self._index(profile)
+            self._append_journal({'op': 'add', 'profile': profile})
+            return profile
         except Exception:
-            return False
+            return None
+
+    def find_duplicate(self, profile: Dict) -> Optional[Dict]:
+        """
+        Busca un perfil guardado con los mismos campos de red
+        
+        Args:
+            profile: Datos del perfil a comparar
+            
+        Returns:
+            Dict o None: El perfil más antiguo con la misma configuración
+        """
+        bucket = self._by_hash.get(profile_hash(profile))
+        if not bucket:
+            return None
+        return next(iter(bucket.values()))
+
+    def dedupe_profiles(self) -> int:
+        """
+        Elimina los perfiles repetidos ya guardados, conservando el más antiguo
+        de cada configuración, y guarda una instantánea nueva
+        
+        Returns:
+            int: Número de perfiles eliminados
+        """
+        duplicates = [profile_id
+                      for bucket in self._by_hash.values() if len(bucket) > 1
+                      for profile_id in sorted(bucket)[1:]]
+        for profile_id in duplicates:
+            self._unindex(profile_id)
+        if duplicates:
+            self.save_profiles()
+        return len(duplicates)
 
     def delete_profile(self, profile_id: int) -> bool:
         """
@@ -65,12 +356,152 @@ class ProfileManager:
             bool: True si se eliminó correctamente
         """
         try:
-            self.profiles = [p for p in self.profiles if p.get('id') != profile_id]
-            self.save_profiles()
+            if self._unindex(profile_id) is None:
+                return False
+            self._append_journal({'op': 'delete', 'id': profile_id})
             return True
         except Exception:
             return False
 
+    def update_profile(self, profile_id: int, changes: Dict) -> bool:
+        """
+        Modifica los campos de un perfil existente
+        
+        Si el perfil conservaba el nombre generado y no se indica uno nuevo,
+        el nombre se vuelve a generar con los datos modificados.
+        
+        Args:
+            profile_id: ID del perfil a modificar
+            changes: Campos a cambiar (el ID no se puede cambiar)
+            
+        Returns:
+            bool: True si se modificó correctamente
+        """
+        try:
+            profile = self.profiles.get(profile_id)
+            if profile is None:
+                return False
+            updated = dict(profile)
+            updated.update({k: v for k, v in changes.items() if k != 'id'})
+            if 'name' not in changes and profile.get('name') == self.generate_profile_name(profile):
+                updated['name'] = self.generate_profile_name(updated)
+            updated['updated_at'] = datetime.now().isoformat()
+            self._replace(updated)
+            self._append_journal({'op': 'update', 'profile': updated})
+            return True
+        except Exception:
+            return False
+
+    def import_profiles(self, path: str, file_format: Optional[str] = None,
+                        batch_size: int = 1000, max_errors: int = 1000) -> Dict:
+        """
+        Importa perfiles desde un archivo CSV o JSON Lines
+        
+        El archivo se lee como un flujo. Cada fila se valida con validator.py;
+        las filas inválidas se informan y se saltan sin detener la
+        importación, y las repetidas (según profile_hash) no se agregan.
+        Los perfiles válidos se guardan en el diario de a `batch_size` con
+        una sola escritura por lote, y al final se guarda una instantánea.
+        
+        Args:
+            path: Archivo a importar
+            file_format: 'csv' o 'jsonl' (por defecto, según la extensión)
+            batch_size: Perfiles por escritura en el diario
+            max_errors: Máximo de errores detallados en el resultado
+            
+        Returns:
+            Dict: {'imported', 'duplicates', 'failed', 'errors'}, donde
+            errors es una lista de (número de fila, descripción)
+        """
+        result = {'imported': 0, 'duplicates': 0, 'failed': 0, 'errors': []}
+        batch: List[Dict] = []
+        created_at = datetime.now().isoformat()
+
+        def report(row_number: int, message: str):
+            result['failed'] += 1
+            if len(result['errors']) < max_errors:
+                result['errors'].append((row_number, message))
+
+        try:
+            for row_number, row in self._read_rows(path, _file_format(path, file_format)):
+                if isinstance(row, str):
+                    report(row_number, row)
+                    continue
+                profile = {field: str(row.get(field) or '').strip() for field in NETWORK_FIELDS}
+                error = validate_profile(profile)
+                if error:
+                    report(row_number, error)
+                    continue
+                digest = profile_hash(profile)
+                if digest in self._by_hash:
+                    result['duplicates'] += 1
+                    continue
+                profile['created_at'] = row.get('created_at') or created_at
+                profile['id'] = self.next_id
+                profile['name'] = row.get('name') or self.generate_profile_name(profile)
+                self.next_id += 1
+                self._index(profile, digest)
+                batch.append({'op': 'add', 'profile': profile})
+                result['imported'] += 1
+                if len(batch) >= batch_size:
+                    self._write_journal(batch)
+                    batch = []
+            if batch:
+                self._write_journal(batch)
+        except Exception as e:
+            print(f"Error al importar perfiles: {str(e)}")
+            report(0, str(e))
+        if result['imported']:
+            self.save_profiles()
+        return result
+
+    def _read_rows(self, path: str, file_format: str) -> Iterator[Tuple[int, object]]:
+        """Recorre las filas del archivo como (número, dict) o (número, error)"""
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            if file_format == 'csv':
+                for row_number, row in enumerate(csv.DictReader(f), start=2):
+                    yield row_number, row
+                return
+            for row_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    yield row_number, "JSON inválido"
+                    continue
+                yield row_number, row if isinstance(row, dict) else "Se esperaba un objeto JSON"
+
+    def export_profiles(self, path: str, file_format: Optional[str] = None) -> int:
+        """
+        Exporta todos los perfiles a un archivo CSV o JSON Lines
+        
+        Se escribe perfil por perfil en un archivo temporal que luego
+        reemplaza al destino.
+        
+        Args:
+            path: Archivo de destino
+            file_format: 'csv' o 'jsonl' (por defecto, según la extensión)
+            
+        Returns:
+            int: Número de perfiles exportados (-1 si hubo un error)
+        """
+        tmp_path = path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+                if _file_format(path, file_format) == 'csv':
+                    writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction='ignore')
+                    writer.writeheader()
+                    writer.writerows(self.profiles.values())
+                else:
+                    for profile in self.profiles.values():
+                        f.write(json.dumps(profile, ensure_ascii=False) + '\n')
+            os.replace(tmp_path, path)
+            return len(self.profiles)
+        except Exception as e:
+            print(f"Error al exportar perfiles: {str(e)}")
+            return -1
+
     def get_profile(self, profile_id: int) -> Optional[Dict]:
         """
         Obtiene un perfil por su ID
@@ -82,18 +513,111 @@ class ProfileManager:
             Dict o None: Datos del perfil o None si no existe
         """
         try:
-            return next((p for p in self.profiles if p.get('id') == profile_id), None)
+            return self.profiles.get(profile_id)
         except Exception:
             return None
 
+    def get_profiles_by_name(self, name: str) -> List[Dict]:
+        """
+        Obtiene los perfiles con un nombre dado
+        
+        Args:
+            name: Nombre exacto del perfil
+            
+        Returns:
+            List[Dict]: Perfiles con ese nombre, en orden de creación
+        """
+        return list(self._by_name.get(name, {}).values())
+
+    def get_profiles_by_interface(self, interface: str) -> List[Dict]:
+        """
+        Obtiene los perfiles de una interfaz
+        
+        Args:
+            interface: Nombre de la interfaz (Wi-Fi, Ethernet0, eth0, etc)
+            
+        Returns:
+            List[Dict]: Perfiles de esa interfaz, en orden de creación
+        """
+        return list(self._by_interface.get(interface, {}).values())
+
+    def _ensure_search_index(self) -> None:
+        """Reconstruye los índices ordenados si hubo cambios desde la última búsqueda"""
+        if not self._search_dirty:
+            return
+        names = sorted((str(p.get('name') or '').lower(), p['id']) for p in self.profiles.values())
+        self._name_keys = [name for name, _ in names]
+        self._name_ids = [profile_id for _, profile_id in names]
+        addresses = []
+        for profile in self.profiles.values():
+            try:
+                addresses.append((int(ipaddress.IPv4Address(profile.get('ip') or '')), profile['id']))
+            except ValueError:
+                continue  # Perfiles DHCP o con IP inválida
+        addresses.sort()
+        self._address_keys = [address for address, _ in addresses]
+        self._address_ids = [profile_id for _, profile_id in addresses]
+        self._search_dirty = False
+
+    def search_profiles(self, prefix: str = '', interface: Optional[str] = None,
+                        cidr: Optional[str] = None) -> List[Dict]:
+        """
+        Busca perfiles combinando filtros
+        
+        Los rangos de nombre y de red se resuelven con búsqueda binaria sobre
+        índices ordenados, así que el costo depende de los resultados y no
+        del total de perfiles.
+        
+        Args:
+            prefix: Comienzo del nombre, sin distinguir mayúsculas ('' = todos)
+            interface: Solo perfiles de esta interfaz (None = todas)
+            cidr: Solo perfiles con IP dentro de esta red, p. ej. '10.20.0.0/16'
+            
+        Returns:
+            List[Dict]: Perfiles encontrados, en orden de creación
+            
+        Raises:
+            ValueError: Si cidr no es una red IPv4 válida
+        """
+        self._ensure_search_index()
+        candidates = None
+        if cidr:
+            network = ipaddress.IPv4Network(cidr, strict=False)
+            lo = bisect.bisect_left(self._address_keys, int(network.network_address))
+            hi = bisect.bisect_right(self._address_keys, int(network.broadcast_address))
+            candidates = self._address_ids[lo:hi]
+        if prefix:
+            key = prefix.lower()
+            lo = bisect.bisect_left(self._name_keys, key)
+            hi = bisect.bisect_left(self._name_keys, key + '\U0010ffff', lo)
+            ids = self._name_ids[lo:hi]
+            candidates = ids if candidates is None else set(ids).intersection(candidates)
+        if candidates is None:
+            if interface is not None:
+                return self.get_profiles_by_interface(interface)
+            return self.get_all_profiles()
+        profiles = [self.profiles[profile_id] for profile_id in sorted(candidates)]
+        if interface is not None:
+            profiles = [p for p in profiles if p.get('interface') == interface]
+        return profiles
+
+    def get_interfaces(self) -> List[str]:
+        """
+        Obtiene las interfaces que tienen perfiles
+        
+        Returns:
+            List[str]: Nombres de interfaz ordenados
+        """
+        return sorted(self._by_interface)
+
     def get_all_profiles(self) -> List[Dict]:
         """
         Obtiene todos los perfiles
         
         Returns:
-            List[Dict]: Lista de perfiles
+            List[Dict]: Lista de perfiles, en orden de creación
         """
-        return self.profiles
+        return list(self.profiles.values())
 
     def generate_profile_name(self, profile: Dict) -> str:
         """
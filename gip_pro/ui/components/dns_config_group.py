@@ -1,16 +1,39 @@
 from PyQt6.QtWidgets import (
-    QGroupBox, QVBoxLayout, QHBoxLayout, QGridLayout,
+    QGroupBox, QHBoxLayout, QGridLayout,
     QLabel, QLineEdit, QPushButton
 )
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from ...dns_benchmark import load_presets, load_results
+from ...network_tools import NetworkTools
+
+class BenchmarkWorker(QThread):
+    """Comparativa de los presets de DNS en segundo plano"""
+    finished_benchmark = pyqtSignal(list)
+    error = pyqtSignal(str)
+
+    def __init__(self, network_tools, presets):
+        super().__init__()
+        self.network_tools = network_tools
+        self.presets = presets
+
+    def run(self):
+        try:
+            # benchmark_dns guarda los resultados en data/dns_benchmark.json
+            self.finished_benchmark.emit(self.network_tools.benchmark_dns(self.presets))
+        except Exception as e:
+            self.error.emit(str(e))
 
 class DNSConfigGroup(QGroupBox):
     """Grupo de configuración DNS con campos para DNS primario y secundario"""
     
     config_changed = pyqtSignal(dict)  # Señal emitida cuando cambia la configuración
+    benchmark_requested = pyqtSignal()  # Se pidió medir la latencia de los presets
     
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, network_tools=None):
         super().__init__("Configuración DNS", parent)
+        self.network_tools = network_tools
+        self.benchmark_worker = None
         self.init_ui()
         
     def init_ui(self):
@@ -29,39 +52,94 @@ class DNSConfigGroup(QGroupBox):
         self.secondary_dns.setPlaceholderText("8.8.4.4")
         layout.addWidget(self.secondary_dns, 1, 1)
         
-        # Presets de DNS
+        # Presets de DNS (data/dns_presets.json)
+        self.presets = load_presets() or {
+            "google": {"name": "Google DNS", "primary": "8.8.8.8", "secondary": "8.8.4.4"},
+            "cloudflare": {"name": "Cloudflare DNS", "primary": "1.1.1.1", "secondary": "1.0.0.1"},
+            "opendns": {"name": "OpenDNS", "primary": "208.67.222.222", "secondary": "208.67.220.220"}
+        }
         preset_layout = QHBoxLayout()
-        self.google_dns = QPushButton("Google DNS")
-        self.cloudflare_dns = QPushButton("Cloudflare DNS")
-        self.opendns = QPushButton("OpenDNS")
-        preset_layout.addWidget(self.google_dns)
-        preset_layout.addWidget(self.cloudflare_dns)
-        preset_layout.addWidget(self.opendns)
+        self.preset_buttons = {}
+        for key in self.presets:
+            button = QPushButton(self.presets[key].get("name", key))
+            button.clicked.connect(lambda _, key=key: self.set_preset(key))
+            preset_layout.addWidget(button)
+            self.preset_buttons[key] = button
+        self.google_dns = self.preset_buttons.get("google")
+        self.cloudflare_dns = self.preset_buttons.get("cloudflare")
+        self.opendns = self.preset_buttons.get("opendns")
         layout.addLayout(preset_layout, 2, 0, 1, 2)
         
+        # Medir latencia de los presets
+        self.benchmark_btn = QPushButton("⏱ Medir DNS")
+        self.benchmark_btn.clicked.connect(self.run_benchmark)
+        layout.addWidget(self.benchmark_btn, 3, 0, 1, 2)
+        
         # Botón aplicar
         self.apply_btn = QPushButton("Aplicar DNS")
-        layout.addWidget(self.apply_btn, 3, 0, 1, 2)
+        layout.addWidget(self.apply_btn, 4, 0, 1, 2)
+        
+        # Latencias de la última medición guardada
+        self.show_benchmark(load_results().values())
         
         # Conectar señales
-        self.google_dns.clicked.connect(lambda: self.set_preset("google"))
-        self.cloudflare_dns.clicked.connect(lambda: self.set_preset("cloudflare"))
-        self.opendns.clicked.connect(lambda: self.set_preset("opendns"))
         self.primary_dns.textChanged.connect(self._emit_config)
         self.secondary_dns.textChanged.connect(self._emit_config)
         
     def set_preset(self, preset):
         """Establece un preset de DNS"""
-        presets = {
-            "google": ("8.8.8.8", "8.8.4.4"),
-            "cloudflare": ("1.1.1.1", "1.0.0.1"),
-            "opendns": ("208.67.222.222", "208.67.220.220")
-        }
-        if preset in presets:
-            primary, secondary = presets[preset]
-            self.primary_dns.setText(primary)
-            self.secondary_dns.setText(secondary)
+        if preset in self.presets:
+            self.primary_dns.setText(self.presets[preset].get("primary", ""))
+            self.secondary_dns.setText(self.presets[preset].get("secondary", ""))
             
+    def run_benchmark(self):
+        """Mide los presets en un hilo aparte y muestra el resultado"""
+        if self.benchmark_worker is not None and self.benchmark_worker.isRunning():
+            return
+        self.benchmark_requested.emit()
+        if self.network_tools is None:
+            self.network_tools = NetworkTools()
+        self.benchmark_btn.setEnabled(False)
+        self.benchmark_btn.setText("⏱ Midiendo...")
+        self.benchmark_worker = BenchmarkWorker(self.network_tools, self.presets)
+        self.benchmark_worker.finished_benchmark.connect(self.on_benchmark_finished)
+        self.benchmark_worker.error.connect(self.on_benchmark_error)
+        self.benchmark_worker.start()
+
+    def on_benchmark_finished(self, results):
+        self.benchmark_btn.setEnabled(True)
+        self.benchmark_btn.setText("⏱ Medir DNS")
+        self.benchmark_btn.setToolTip("")
+        self.show_benchmark(results)
+
+    def on_benchmark_error(self, message):
+        self.benchmark_btn.setEnabled(True)
+        self.benchmark_btn.setText("⏱ Medir DNS")
+        self.benchmark_btn.setToolTip(f"Error: {message}")
+
+    def show_benchmark(self, results):
+        """
+        Muestra en cada botón de preset su latencia medida.
+
+        Args:
+            results: resultados de dns_benchmark (preset, p50, p95,
+                failure_rate, rank)
+        """
+        for result in results:
+            button = self.preset_buttons.get(result.get("preset"))
+            if button is None:
+                continue
+            name = self.presets[result["preset"]].get("name", result["preset"])
+            if result.get("p50") is None:
+                button.setText(f"{name} (sin respuesta)")
+                button.setToolTip("")
+                continue
+            best = " ★" if result.get("rank") == 1 else ""
+            button.setText(f"{name} ({result['p50']:.0f} ms){best}")
+            button.setToolTip(f"p50 {result['p50']:.1f} ms · p95 {result['p95']:.1f} ms · "
+                              f"p99 {result['p99']:.1f} ms · fallos {result['failure_rate'] * 100:.1f}%")
+            
+
     def get_config(self):
         """Obtiene la configuración actual"""
         return {
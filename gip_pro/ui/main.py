@@ -20,6 +20,12 @@ except ImportError:
     print("Error: PyQt5 no está instalado.\nInstale PyQt5 ejecutando: pip install PyQt5")
     PYQT5_AVAILABLE = False
 
+try:
+    from .. import netlink
+except ImportError:
+    # Ejecutado como script suelto: se usan los comandos de iproute2
+    netlink = None
+
 class NetworkWorker(QThread):
     """Worker thread para operaciones de red que pueden tomar tiempo"""
     finished = pyqtSignal(str)
@@ -462,6 +468,11 @@ class TabIP(QMainWindow):
                     self.add_status_message(f"✅ IP cambiada correctamente a {ip} en {interface}")
             elif platform.system() == "Linux":
                 mask_cidr = mask if "/" in mask else self.mask_to_cidr(mask) if mask else "24"
+                if netlink is not None and netlink.is_available():
+                    # Un solo lote netlink, sin lanzar procesos
+                    netlink.set_ipv4_config(interface, ip, int(mask_cidr.lstrip("/")), gateway or None)
+                    self.add_status_message(f"✅ IP cambiada correctamente a {ip} en {interface}")
+                    return
                 cmds = [
                     ["sudo", "ip", "addr", "flush", "dev", interface],
                     ["sudo", "ip", "addr", "add", f"{ip}/{mask_cidr}", "dev", interface]
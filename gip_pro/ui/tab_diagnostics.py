@@ -1,5 +1,33 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QTextEdit, QGroupBox, QFormLayout, QLineEdit
-from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QPushButton, QLabel, QTextEdit, QGroupBox, QFormLayout, QLineEdit
+from PyQt6.QtCore import QThread, pyqtSignal
+
+
+class SweepWorker(QThread):
+    """Barrido de subred en segundo plano; emite cada host según aparece"""
+    host_found = pyqtSignal(dict)
+    progress = pyqtSignal(int)
+    finished_sweep = pyqtSignal(list)
+    error = pyqtSignal(str)
+
+    def __init__(self, network_tools, cidr):
+        super().__init__()
+        self.network_tools = network_tools
+        self.cidr = cidr
+        self.checked = 0
+
+    def on_result(self, result):
+        self.checked += 1
+        if result['alive']:
+            self.host_found.emit(result)
+        if self.checked % 256 == 0:
+            self.progress.emit(self.checked)
+
+    def run(self):
+        try:
+            self.finished_sweep.emit(self.network_tools.sweep(self.cidr, callback=self.on_result))
+        except Exception as e:
+            self.error.emit(str(e))
+
 
 # Pestaña de herramientas de diagnóstico
 # Aquí se define la UI de diagnóstico
@@ -41,6 +69,23 @@ class DiagnosticsTab(QWidget):
         traceroute_layout.addRow("Resultado:", self.traceroute_result)
         layout.addWidget(traceroute_group)
 
+        # Grupo de barrido de subred
+        sweep_group = QGroupBox("📡 Descubrir Hosts")
+        sweep_layout = QFormLayout(sweep_group)
+        self.sweep_input = QLineEdit()
+        self.sweep_input.setPlaceholderText("192.168.1.0/24")
+        self.sweep_btn = QPushButton("Barrer subred")
+        self.sweep_btn.clicked.connect(self.run_sweep)
+        self.sweep_status = QLabel("")
+        self.sweep_result = QTextEdit()
+        self.sweep_result.setReadOnly(True)
+        sweep_layout.addRow("Subred:", self.sweep_input)
+        sweep_layout.addRow(self.sweep_btn)
+        sweep_layout.addRow(self.sweep_status)
+        sweep_layout.addRow("Hosts vivos:", self.sweep_result)
+        layout.addWidget(sweep_group)
+        self.sweep_worker = None
+
         # Grupo de consulta DNS
         dns_group = QGroupBox("🔎 Consulta DNS")
         dns_layout = QFormLayout(dns_group)
@@ -64,7 +109,7 @@ class DiagnosticsTab(QWidget):
             return
         success, output = self.network_tools.ping_test(target)
         self.ping_result.setText(output)
-        self.logger.log_info(f"Ping a {target}: {'éxito' if success else 'fallo'}")
+        self.logger.log_info("Ping a %s: %s", target, 'éxito' if success else 'fallo', event_type='ping_test')
 
     def run_traceroute(self):
         target = self.traceroute_input.text()
@@ -73,7 +118,38 @@ class DiagnosticsTab(QWidget):
             return
         success, output = self.network_tools.traceroute_test(target)
         self.traceroute_result.setText(output)
-        self.logger.log_info(f"Traceroute a {target}: {'éxito' if success else 'fallo'}")
+        self.logger.log_info("Traceroute a %s: %s", target, 'éxito' if success else 'fallo', event_type='traceroute')
+
+    def run_sweep(self):
+        cidr = self.sweep_input.text().strip()
+        if not cidr:
+            self.sweep_status.setText("Ingrese una subred válida.")
+            return
+        if self.sweep_worker and self.sweep_worker.isRunning():
+            return
+        self.sweep_result.clear()
+        self.sweep_status.setText("Barriendo...")
+        self.sweep_btn.setEnabled(False)
+        self.sweep_worker = SweepWorker(self.network_tools, cidr)
+        self.sweep_worker.host_found.connect(self.on_host_found)
+        self.sweep_worker.progress.connect(lambda checked: self.sweep_status.setText(f"Barriendo... {checked} direcciones"))
+        self.sweep_worker.finished_sweep.connect(self.on_sweep_finished)
+        self.sweep_worker.error.connect(self.on_sweep_error)
+        self.sweep_worker.start()
+
+    def on_host_found(self, result):
+        rtt = f"{result['rtt']:.1f} ms" if result['rtt'] is not None else ''
+        cached = ' (caché)' if result['cached'] else ''
+        self.sweep_result.append(f"{result['address']}  {result['method']}  {rtt}{cached}")
+
+    def on_sweep_finished(self, alive):
+        self.sweep_btn.setEnabled(True)
+        self.sweep_status.setText(f"{len(alive)} hosts vivos en {self.sweep_worker.cidr}")
+        self.logger.log_info("Barrido de %s: %d hosts", self.sweep_worker.cidr, len(alive), event_type='sweep')
+
+    def on_sweep_error(self, message):
+        self.sweep_btn.setEnabled(True)
+        self.sweep_status.setText(f"Error: {message}")
 
     def run_dns_lookup(self):
         domain = self.dns_input.text()
@@ -82,4 +158,4 @@ class DiagnosticsTab(QWidget):
             return
         success, output = self.network_tools.dns_lookup(domain)
         self.dns_result.setText(str(output))
-        self.logger.log_info(f"Consulta DNS a {domain}: {'éxito' if success else 'fallo'}")
+        self.logger.log_info("Consulta DNS a %s: %s", domain, 'éxito' if success else 'fallo', event_type='dns_lookup')
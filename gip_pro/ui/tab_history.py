@@ -1,10 +1,16 @@
 from PyQt6.QtCore import Qt
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QListWidget, QPushButton, QHBoxLayout, QGroupBox, QSizePolicy, QFrame
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QListWidget, QListWidgetItem, QGroupBox, QSizePolicy
+from datetime import datetime
+
+# Rol con las filas hijas insertadas al desplegar una racha (0 = plegada)
+EXPANDED_ROLE = Qt.ItemDataRole.UserRole.value + 1
 
 class TabHistory(QWidget):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, logger=None):
         super().__init__(parent)
+        self.logger = logger
         self.init_ui()
+        self.refresh_history()
 
     def init_ui(self):
         self.setStyleSheet('''
@@ -33,9 +39,57 @@ class TabHistory(QWidget):
         vbox.setSpacing(10)
         self.list = QListWidget()
         self.list.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.list.itemDoubleClicked.connect(self.toggle_run)
         vbox.addWidget(self.list)
         main_layout.addWidget(group)
         self.setLayout(main_layout)
         self.setMinimumWidth(520)
         self.setMinimumHeight(480)
         self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+
+    def refresh_history(self, limit=500):
+        """Muestra los eventos más recientes del logger, el último primero"""
+        self.list.clear()
+        if not self.logger:
+            return
+        for entry in reversed(self.logger.get_recent_logs(limit)):
+            text = f"[{self.format_time(entry.timestamp)}] {'✅' if entry.success else '❌'} {entry.type}: {entry.details}"
+            if entry.count > 1:
+                text += f"  (×{entry.count})"
+            item = QListWidgetItem(text)
+            item.setData(Qt.ItemDataRole.UserRole, entry)
+            item.setData(EXPANDED_ROLE, 0)
+            if entry.count > 1:
+                item.setToolTip(f"Primera vez: {self.format_time(entry.first_seen)}\n"
+                                f"Última vez: {self.format_time(entry.last_seen)}\n"
+                                "Doble clic para desplegar")
+            self.list.addItem(item)
+
+    def toggle_run(self, item):
+        """Despliega o pliega una racha de eventos idénticos agrupados"""
+        entry = item.data(Qt.ItemDataRole.UserRole)
+        if entry is None or entry.count <= 1:
+            return
+        row = self.list.row(item)
+        # La entrada es la del buffer y puede seguir creciendo mientras está
+        # desplegada: se pliegan exactamente las filas que se insertaron
+        inserted = item.data(EXPANDED_ROLE)
+        if inserted:
+            for _ in range(inserted):
+                self.list.takeItem(row + 1)
+            item.setData(EXPANDED_ROLE, 0)
+            return
+        count = entry.count
+        children = [f"    ↳ {self.format_time(entry.first_seen)} (primera)"]
+        if count > 2:
+            children.append(f"    ↳ … {count - 2} repeticiones intermedias")
+        children.append(f"    ↳ {self.format_time(entry.last_seen)} (última)")
+        for offset, text in enumerate(children, start=1):
+            self.list.insertItem(row + offset, QListWidgetItem(text))
+        item.setData(EXPANDED_ROLE, len(children))
+
+    def format_time(self, timestamp):
+        try:
+            return datetime.fromisoformat(timestamp).strftime("%d/%m/%Y %H:%M:%S")
+        except Exception:
+            return timestamp or '--'
@@ -5,13 +5,14 @@ from PyQt6.QtCore import Qt
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QListWidget, QPushButton, QHBoxLayout, 
     QGroupBox, QAbstractItemView, QListWidgetItem, QMessageBox, QFormLayout, 
-    QSizePolicy, QFrame, QTextEdit
+    QSizePolicy, QLineEdit, QComboBox
 )
 from ..profile_manager import ProfileManager
-import json
 from datetime import datetime
 
 class TabProfiles(QWidget):
+    MAX_LISTED = 1000  # Perfiles que se muestran como máximo en la lista
+
     def __init__(self, network_tools=None, logger=None, parent=None):
         super().__init__(parent)
         self.network_tools = network_tools
@@ -37,6 +38,17 @@ class TabProfiles(QWidget):
         left_panel = QWidget()
         left_layout = QVBoxLayout(left_panel)
         left_layout.setSpacing(8)
+
+        # Búsqueda: prefijo del nombre o red en formato CIDR
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Buscar por nombre o red (10.20.0.0/16)")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.textChanged.connect(self.filter_profiles)
+        left_layout.addWidget(self.search_input)
+
+        self.interface_filter = QComboBox()
+        self.interface_filter.currentIndexChanged.connect(self.filter_profiles)
+        left_layout.addWidget(self.interface_filter)
         
         # Lista de perfiles
         self.list = QListWidget()
@@ -45,6 +57,10 @@ class TabProfiles(QWidget):
         self.list.setMinimumWidth(250)
         left_layout.addWidget(self.list)
 
+        self.count_label = QLabel("")
+        self.count_label.setStyleSheet("color: gray;")
+        left_layout.addWidget(self.count_label)
+
         # Panel derecho: Detalles del perfil
         right_panel = QWidget()
         right_layout = QVBoxLayout(right_panel)
@@ -97,14 +113,48 @@ class TabProfiles(QWidget):
         self.apply_btn.clicked.connect(self.apply_selected_profile)
         self.delete_btn.clicked.connect(self.delete_selected_profile)
 
+    def refresh_interfaces(self):
+        """Actualiza el filtro de interfaces conservando la selección"""
+        current = self.interface_filter.currentData()
+        self.interface_filter.blockSignals(True)
+        self.interface_filter.clear()
+        self.interface_filter.addItem("Todas las interfaces", None)
+        for interface in self.profile_manager.get_interfaces():
+            self.interface_filter.addItem(interface, interface)
+        index = self.interface_filter.findData(current)
+        self.interface_filter.setCurrentIndex(max(index, 0))
+        self.interface_filter.blockSignals(False)
+
     def refresh_profiles(self):
         """Actualiza la lista de perfiles"""
+        self.refresh_interfaces()
+        self.filter_profiles()
+
+    def filter_profiles(self):
+        """Muestra los perfiles que cumplen la búsqueda y la interfaz elegida"""
+        text = self.search_input.text().strip()
+        interface = self.interface_filter.currentData()
+        try:
+            if '/' in text:
+                profiles = self.profile_manager.search_profiles(interface=interface, cidr=text)
+            else:
+                profiles = self.profile_manager.search_profiles(prefix=text, interface=interface)
+        except ValueError:
+            # Red incompleta mientras se escribe: se muestra la lista vacía
+            profiles = []
+
+        self.list.setUpdatesEnabled(False)
         self.list.clear()
-        profiles = self.profile_manager.get_all_profiles()
-        for profile in profiles:
+        for profile in profiles[:self.MAX_LISTED]:
             item = QListWidgetItem(profile.get('name', 'Sin nombre'))
             item.setData(Qt.ItemDataRole.UserRole, profile.get('id'))
             self.list.addItem(item)
+        self.list.setUpdatesEnabled(True)
+
+        if len(profiles) > self.MAX_LISTED:
+            self.count_label.setText(f"Mostrando {self.MAX_LISTED} de {len(profiles)} perfiles")
+        else:
+            self.count_label.setText(f"{len(profiles)} perfiles")
 
     def on_profile_selected(self, item):
         """Maneja la selección de un perfil"""
@@ -170,54 +220,16 @@ class TabProfiles(QWidget):
             return
             
         try:
-            # Verificar que el método existe antes de usarlo
-            if hasattr(self.network_tools, 'set_static_ip'):
-                # Aplicar configuración IP usando el método correcto
-                success = self.network_tools.set_static_ip(
-                    self.selected_profile['interface'],
-                    self.selected_profile['ip'],
-                    self.selected_profile['mask'],
-                    self.selected_profile.get('gateway', '')
-                )
-                
-                if not success:
-                    raise Exception("No se pudo configurar la IP estática")
-                    
-            elif hasattr(self.network_tools, 'configure_static_ip'):
-                # Método alternativo si existe
-                success = self.network_tools.configure_static_ip(
-                    interface=self.selected_profile['interface'],
-                    ip_address=self.selected_profile['ip'],
-                    subnet_mask=self.selected_profile['mask'],
-                    gateway=self.selected_profile.get('gateway', '')
-                )
-                
-                if not success:
-                    raise Exception("No se pudo configurar la IP estática")
-            else:
-                raise Exception("Método de configuración de IP no disponible")
-            
-            # Aplicar DNS si están configurados y el método existe
-            dns1 = self.selected_profile.get('dns1')
-            dns2 = self.selected_profile.get('dns2')
+            # Solo se ejecutan los cambios respecto de la configuración
+            # actual; si solo cambian los DNS no se reconecta la interfaz
+            plan = self.network_tools.apply_profile(self.selected_profile)
             
-            if dns1 and hasattr(self.network_tools, 'configure_dns'):
-                dns_servers = [dns1]
-                if dns2:
-                    dns_servers.append(dns2)
-                    
-                dns_success = self.network_tools.configure_dns(
-                    self.selected_profile['interface'],
-                    dns_servers
-                )
-                
-                if not dns_success:
-                    print(f"Advertencia: No se pudieron configurar los DNS")
-                    
             QMessageBox.information(
                 self,
                 "Perfil aplicado",
                 f"Perfil '{self.selected_profile['name']}' aplicado correctamente"
+                if plan['changes'] else
+                f"El perfil '{self.selected_profile['name']}' ya estaba aplicado"
             )
             
             if self.logger:
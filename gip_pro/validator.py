@@ -7,3 +7,34 @@ def validate_ip(ip):
 
 def validate_dns(dns):
     return validate_ip(dns)
+
+# Prefijo que se aplica cuando un perfil con IP fija no indica máscara
+DEFAULT_PREFIX = 24
+
+def parse_mask(mask):
+    """
+    Longitud de prefijo de una máscara en cualquiera de las formas que
+    admiten los perfiles: decimal con los bits de red contiguos
+    (255.255.255.0), prefijo ('24' o '/24') o vacía (DEFAULT_PREFIX).
+    Devuelve None si la máscara no es válida.
+    """
+    mask = str(mask or '').strip()
+    if not mask:
+        return DEFAULT_PREFIX
+    if mask.startswith('/'):
+        mask = mask[1:]
+    if mask.isdigit():
+        prefix = int(mask)
+        return prefix if 1 <= prefix <= 32 else None
+    if not validate_ip(mask):
+        return None
+    value = 0
+    for part in mask.split('.'):
+        value = (value << 8) | int(part)
+    inverted = ~value & 0xFFFFFFFF
+    if value == 0 or (inverted & (inverted + 1)) != 0:
+        return None
+    return bin(value).count('1')
+
+def validate_mask(mask):
+    return parse_mask(mask) is not None
@@ -0,0 +1,136 @@
+# Servidor DNS mínimo (UDP y TCP) en 127.0.0.1 para las pruebas del resolvedor
+import asyncio
+import socket
+import struct
+from collections import Counter
+from typing import Optional
+
+from gip_pro.dns_resolver import FLAG_QR, FLAG_RD, FLAG_TC, RECORD_TYPES
+
+# Respuestas fijas del servidor
+A_TTL = 1           # a.test (y cualquier otro nombre), A 10.0.0.1
+NEGATIVE_TTL = 1    # nx.test, NXDOMAIN con SOA de mínimo 1 s
+TXT_RECORDS = 30    # big.test: truncada por UDP, completa por TCP
+SLOW_DELAY = 0.2    # slow.test tarda esto en responder
+
+
+def _name(name: str) -> bytes:
+    return b''.join(bytes([len(label)]) + label.encode('ascii') for label in name.split('.')) + b'\0'
+
+
+def _rr(rtype: int, ttl: int, rdata: bytes) -> bytes:
+    # 0xc00c: puntero al nombre de la pregunta
+    return b'\xc0\x0c' + struct.pack('!HHIH', rtype, 1, ttl, len(rdata)) + rdata
+
+
+class StubServer:
+    """
+    Servidor DNS de prueba en 127.0.0.1 (mismo puerto en UDP y TCP).
+
+    Cuenta las consultas recibidas por nombre en `queries`. Uso:
+        async with StubServer() as server:
+            resolver = Resolver([('127.0.0.1', server.port)])
+    """
+
+    def __init__(self, delay: float = 0.0, drop_every: int = 0):
+        """
+        Args:
+            delay: espera antes de cada respuesta (segundos)
+            drop_every: no responde una de cada `drop_every` consultas
+                (1 = no responde ninguna; 0 = responde todas)
+        """
+        self.delay = delay
+        self.drop_every = drop_every
+        self.received = 0
+        self.queries: Counter = Counter()
+        self.port = None
+        self._transport = None
+        self._tcp = None
+
+    async def start(self) -> int:
+        loop = asyncio.get_running_loop()
+        # El puerto lo elige TCP y UDP se enlaza al mismo
+        self._tcp = await asyncio.start_server(self._handle_tcp, '127.0.0.1', 0, family=socket.AF_INET)
+        self.port = self._tcp.sockets[0].getsockname()[1]
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _StubProtocol(self), local_addr=('127.0.0.1', self.port))
+        return self.port
+
+    def close(self):
+        if self._transport is not None:
+            self._transport.close()
+        if self._tcp is not None:
+            self._tcp.close()
+
+    async def __aenter__(self) -> 'StubServer':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    @property
+    def address(self) -> str:
+        """'127.0.0.1:puerto', como los servidores de un preset"""
+        return f'127.0.0.1:{self.port}'
+
+    def answer(self, query: bytes, tcp: bool) -> Optional[bytes]:
+        """Respuesta a una consulta, o None para no responder"""
+        query_id, flags = struct.unpack_from('!HH', query)
+        offset, labels = 12, []
+        while query[offset]:
+            length = query[offset]
+            labels.append(query[offset + 1:offset + 1 + length].decode('ascii'))
+            offset += 1 + length
+        name = '.'.join(labels)
+        qtype = struct.unpack_from('!H', query, offset + 1)[0]
+        question = query[12:offset + 5]
+        self.queries[name] += 1
+        self.received += 1
+        if self.drop_every and self.received % self.drop_every == 0:
+            return None
+
+        answers, authority, rcode, flags = [], [], 0, FLAG_QR | (flags & FLAG_RD) | 0x80
+        if name == 'nx.test':
+            rcode = 3
+            soa = _name('ns.test') + _name('admin.test') + struct.pack('!IIIII', 1, 3600, 600, 86400, NEGATIVE_TTL)
+            authority.append(_rr(RECORD_TYPES['SOA'], 60, soa))
+        elif name == 'big.test' and not tcp:
+            flags |= FLAG_TC
+        elif name == 'big.test':
+            answers = [_rr(RECORD_TYPES['TXT'], 60, bytes([40]) + b'x' * 40) for _ in range(TXT_RECORDS)]
+        elif qtype == RECORD_TYPES['A']:
+            answers.append(_rr(RECORD_TYPES['A'], A_TTL, bytes([10, 0, 0, 1])))
+        header = struct.pack('!HHHHHH', query_id, flags | rcode, 1, len(answers), len(authority), 0)
+        return header + question + b''.join(answers) + b''.join(authority)
+
+    def delay_for(self, query: bytes) -> float:
+        return self.delay + (SLOW_DELAY if b'\x04slow\x04test\x00' in query else 0.0)
+
+    async def _handle_tcp(self, reader, writer):
+        try:
+            length = struct.unpack('!H', await reader.readexactly(2))[0]
+            query = await reader.readexactly(length)
+            response = self.answer(query, tcp=True)
+            await asyncio.sleep(self.delay_for(query))
+            if response is not None:
+                writer.write(struct.pack('!H', len(response)) + response)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+class _StubProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server: StubServer):
+        self.server = server
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        response = self.server.answer(data, tcp=False)
+        if response is not None:
+            asyncio.get_running_loop().call_later(self.server.delay_for(data), self.transport.sendto, response, addr)
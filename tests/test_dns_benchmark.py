@@ -0,0 +1,45 @@
+# Comparativa de presets de DNS contra servidores locales de prueba
+import asyncio
+
+import pytest
+
+from dns_stub import StubServer
+from gip_pro.dns_benchmark import benchmark, parse_server
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('1.1.1.1', ('1.1.1.1', 53)),
+    ('127.0.0.1:5353', ('127.0.0.1', 5353)),
+    ('2606:4700:4700::1111', ('2606:4700:4700::1111', 53)),
+    ('[2606:4700:4700::1111]:5353', ('2606:4700:4700::1111', 5353)),
+    ('[::1]', ('::1', 53)),
+])
+def test_parse_server(value, expected):
+    assert parse_server(value) == expected
+
+
+def test_ranking_puts_reliable_fast_servers_first():
+    servers = {'rapido': StubServer(), 'lento': StubServer(delay=0.05),
+               'con_perdidas': StubServer(drop_every=3), 'mudo': StubServer(drop_every=1)}
+
+    async def scenario():
+        for server in servers.values():
+            await server.start()
+        try:
+            presets = {key: {'name': key, 'primary': server.address} for key, server in servers.items()}
+            return await benchmark(presets, ['a.test', 'b.test', 'c.test'], rounds=4, timeout=0.3)
+        finally:
+            for server in servers.values():
+                server.close()
+
+    results = asyncio.run(scenario())
+    # Primero los fiables por p50, luego los que pierden consultas y al
+    # final los que no respondieron
+    assert [result['preset'] for result in results] == ['rapido', 'lento', 'con_perdidas', 'mudo']
+    assert [result['rank'] for result in results] == [1, 2, 3, 4]
+    by_preset = {result['preset']: result for result in results}
+    assert by_preset['rapido']['queries'] == 12
+    assert by_preset['rapido']['failures'] == 0
+    assert by_preset['con_perdidas']['failure_rate'] > 0.05
+    assert by_preset['mudo']['p50'] is None
+    assert by_preset['mudo']['failure_rate'] == 1.0
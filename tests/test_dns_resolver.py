@@ -0,0 +1,71 @@
+# Resolvedor DNS contra el servidor local de prueba (tests/dns_stub.py)
+import asyncio
+
+from dns_stub import A_TTL, NEGATIVE_TTL, TXT_RECORDS, StubServer
+from gip_pro.dns_resolver import DNSCache, Resolver
+
+
+def _resolver(server, **options):
+    options.setdefault('timeout', 1.0)
+    options.setdefault('attempts', 1)
+    return Resolver([('127.0.0.1', server.port)], **options)
+
+
+def test_truncated_udp_answer_is_retried_over_tcp():
+    async def scenario():
+        async with StubServer() as server:
+            result = await _resolver(server, cache=False).query('big.test', 'TXT')
+            return result, server.queries['big.test']
+
+    result, queries = asyncio.run(scenario())
+    assert result['error'] is None
+    assert len(result['answers']) == TXT_RECORDS
+    assert queries == 2  # UDP truncada + TCP
+
+
+def test_answers_are_cached_until_their_ttl_expires():
+    async def scenario():
+        async with StubServer() as server:
+            resolver = _resolver(server, cache=DNSCache())
+            first = await resolver.query('a.test')
+            second = await resolver.query('a.test')
+            before = server.queries['a.test']
+            await asyncio.sleep(A_TTL + 0.1)
+            third = await resolver.query('a.test')
+            return first, second, third, before, server.queries['a.test']
+
+    first, second, third, before, after = asyncio.run(scenario())
+    assert not first['cached'] and second['cached'] and not third['cached']
+    assert before == 1
+    assert after == 2
+
+
+def test_nxdomain_is_cached_for_the_soa_minimum():
+    async def scenario():
+        async with StubServer() as server:
+            resolver = _resolver(server, cache=DNSCache())
+            first = await resolver.query('nx.test')
+            second = await resolver.query('nx.test')
+            before = server.queries['nx.test']
+            # La SOA tiene TTL 60 pero mínimo NEGATIVE_TTL: manda el menor
+            await asyncio.sleep(NEGATIVE_TTL + 0.1)
+            await resolver.query('nx.test')
+            return first, second, before, server.queries['nx.test']
+
+    first, second, before, after = asyncio.run(scenario())
+    assert first['rcode'] == 'NXDOMAIN'
+    assert second['cached']
+    assert before == 1
+    assert after == 2
+
+
+def test_identical_inflight_queries_share_one_request():
+    async def scenario():
+        async with StubServer() as server:
+            resolver = _resolver(server, cache=False)
+            results = await asyncio.gather(*(resolver.query('slow.test') for _ in range(50)))
+            return results, server.queries['slow.test']
+
+    results, queries = asyncio.run(scenario())
+    assert queries == 1
+    assert all(result['answers'] for result in results)
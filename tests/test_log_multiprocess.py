@@ -0,0 +1,98 @@
+# Varios procesos escribiendo el mismo logs.txt a la vez
+import glob
+import gzip
+import json
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from gip_pro.log_storage import JsonLinesStorage
+from gip_pro.logger import NetworkLogger
+
+PROCESSES = int(os.environ.get('GIP_STRESS_PROCESSES', 8))
+EVENTS = int(os.environ.get('GIP_STRESS_EVENTS', 2000))
+
+# Cada tanto un detalle mayor que PIPE_BUF, para pasar por el bloqueo exclusivo
+LONG_DETAIL_EVERY = 997
+
+# Configuraciones en las que el historial en disco debe quedar completo. En
+# la de compactación, max_entries alcanza para todos los eventos, así que
+# cada compactación (con el umbral bajo, varias por ejecución) debe
+# conservar también las líneas que otros procesos agregan mientras tanto.
+CONFIGS = {
+    'rotacion': {'max_entries': 100, 'flush_batch_size': 64, 'rotate_max_bytes': 200000,
+                 'rotate_daily': False},
+    'sin_compactar': {'max_entries': 100, 'flush_batch_size': 64, 'compact_threshold_bytes': 0},
+    'compactacion': {'max_entries': PROCESSES * EVENTS, 'flush_batch_size': 64,
+                     'compact_threshold_bytes': 64 * 1024},
+}
+
+
+def _worker(directory, worker, events):
+    logger = NetworkLogger(os.path.join(directory, 'logs.txt'), os.path.join(directory, 'log_config.json'))
+    for i in range(events):
+        padding = 'X' * 5000 if i % LONG_DETAIL_EVERY == 0 else ''
+        logger.log_connection_event(f'w{worker}', f'{padding}{worker}:{i}', True)
+    logger.close()
+
+
+def _read_events(directory):
+    """Detalles de los eventos en disco (logs.txt y segmentos) y líneas ilegibles"""
+    seen = []
+    bad = 0
+    for path in glob.glob(os.path.join(directory, 'logs*.txt*')):
+        if path.endswith('.tmp'):
+            continue
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rb') as f:
+            for line in f:
+                try:
+                    seen.append(json.loads(line)['details'].lstrip('X'))
+                except Exception:
+                    bad += 1
+    return seen, bad
+
+
+@pytest.mark.parametrize('name', list(CONFIGS))
+def test_concurrent_writers_keep_every_event(tmp_path, name):
+    directory = str(tmp_path)
+    with open(os.path.join(directory, 'log_config.json'), 'w', encoding='utf-8') as f:
+        json.dump(CONFIGS[name], f)
+    workers = [multiprocessing.Process(target=_worker, args=(directory, k, EVENTS))
+               for k in range(PROCESSES)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+    assert [process.exitcode for process in workers] == [0] * PROCESSES
+
+    # Un último logger termina de comprimir lo que quedó pendiente
+    NetworkLogger(os.path.join(directory, 'logs.txt'), os.path.join(directory, 'log_config.json')).close()
+    deadline = time.monotonic() + 10
+    while glob.glob(os.path.join(directory, 'logs.*.txt')) and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    seen, bad = _read_events(directory)
+    expected = {f'{k}:{i}' for k in range(PROCESSES) for i in range(EVENTS)}
+    assert bad == 0
+    assert len(seen) == len(set(seen))
+    assert expected - set(seen) == set()
+    assert glob.glob(os.path.join(directory, '*.tmp')) == []
+
+
+def test_stale_archive_temporaries_are_removed(tmp_path):
+    dead = multiprocessing.Process(target=int)
+    dead.start()
+    dead.join()
+    stale = tmp_path / f'logs.3.txt.gz.{dead.pid}.tmp'
+    live = tmp_path / f'logs.3.txt.gz.{os.getpid()}.tmp'
+    other = tmp_path / 'logs.4.txt.gz.abc.tmp'
+    for path in (stale, live, other):
+        path.write_bytes(b'')
+
+    JsonLinesStorage(str(tmp_path / 'logs.txt')).close()
+
+    assert not stale.exists()
+    assert live.exists() and other.exists()
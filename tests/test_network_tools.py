@@ -0,0 +1,53 @@
+# DNS pedidos a un backend que no puede aplicarlos
+import pytest
+
+from gip_pro.network_backends import FakeBackend
+from gip_pro.network_tools import NetworkTools
+
+
+class NoDNSBackend(FakeBackend):
+    """Como iproute2 o netlink: cambia direcciones pero no DNS"""
+    supports_dns = False
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.events = []
+
+    def log_event(self, event_type, data):
+        self.events.append(event_type)
+
+
+def test_set_dns_unsupported_raises_and_logs_nothing():
+    logger = RecordingLogger()
+    backend = NoDNSBackend()
+    tools = NetworkTools(logger, backend)
+    with pytest.raises(NotImplementedError):
+        tools.set_dns('eth0', '1.1.1.1', '1.0.0.1')
+    assert logger.events == []
+    assert backend.interfaces['eth0']['dns'] == []
+
+
+def test_profile_with_unsupported_dns_applies_nothing():
+    backend = NoDNSBackend()
+    tools = NetworkTools(None, backend)
+    profile = {'interface': 'eth0', 'ip': '10.0.0.2', 'mask': '24', 'gateway': '10.0.0.1', 'dns1': '1.1.1.1'}
+    with pytest.raises(NotImplementedError):
+        tools.apply_profile(profile)
+    assert backend.interfaces['eth0']['ip'] == ''
+    # Sin DNS el mismo perfil se aplica
+    assert 'address' in tools.apply_profile(dict(profile, dns1=''))['changes']
+
+
+def test_benchmark_apply_to_unsupported_fails_before_measuring():
+    tools = NetworkTools(None, NoDNSBackend())
+    with pytest.raises(NotImplementedError):
+        tools.benchmark_dns(presets={}, apply_to='eth0')
+
+
+def test_set_dns_supported_logs_event():
+    logger = RecordingLogger()
+    backend = FakeBackend()
+    NetworkTools(logger, backend).set_dns('eth0', '1.1.1.1', '1.0.0.1')
+    assert logger.events == ['set_dns']
+    assert backend.interfaces['eth0']['dns'] == ['1.1.1.1', '1.0.0.1']
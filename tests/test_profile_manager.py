@@ -0,0 +1,26 @@
+# Orden de creación de los perfiles tras modificarlos
+from gip_pro.profile_manager import ProfileManager
+
+
+def _profile(i):
+    return {'name': f'perfil {i}', 'interface': 'eth0' if i % 2 else 'wlan0', 'ip': f'10.0.0.{i + 1}',
+            'mask': '255.255.255.0', 'gateway': '10.0.0.254', 'dns1': '', 'dns2': ''}
+
+
+def test_update_keeps_creation_order(tmp_path):
+    manager = ProfileManager(str(tmp_path / 'profiles.json'))
+    for i in range(4):
+        assert manager.add_profile(_profile(i))
+    ids = [profile['id'] for profile in manager.get_all_profiles()]
+
+    assert manager.update_profile(ids[0], {'interface': 'eth0', 'dns1': '1.1.1.1'})
+    assert manager.update_profile(ids[2], {'name': 'otro'})
+
+    assert [p['id'] for p in manager.get_all_profiles()] == ids
+    assert [p['id'] for p in manager.search_profiles()] == ids
+    assert [p['id'] for p in manager.get_profiles_by_interface('eth0')] == [ids[0], ids[1], ids[3]]
+
+    # Al recargar, el diario vuelve a aplicar las modificaciones en su lugar
+    reloaded = ProfileManager(str(tmp_path / 'profiles.json'))
+    assert [p['id'] for p in reloaded.get_all_profiles()] == ids
+    assert [p['id'] for p in reloaded.get_profiles_by_interface('eth0')] == [ids[0], ids[1], ids[3]]
@@ -0,0 +1,24 @@
+# Máscaras: el validador y el camino de aplicación aceptan las mismas formas
+import pytest
+
+from gip_pro.network_backends import mask_to_prefix
+from gip_pro.profile_manager import validate_profile
+from gip_pro.validator import parse_mask
+
+
+@pytest.mark.parametrize('mask, prefix', [
+    ('255.255.255.0', 24), ('24', 24), ('/24', 24), (' /16 ', 16), ('', 24), (None, 24),
+    ('255.255.255.255', 32),
+])
+def test_valid_masks(mask, prefix):
+    assert parse_mask(mask) == prefix
+    assert mask_to_prefix(mask) == prefix
+    assert validate_profile({'interface': 'eth0', 'ip': '10.0.0.2', 'mask': mask}) is None
+
+
+@pytest.mark.parametrize('mask', ['255.0.255.0', '0.0.0.0', '0', '/0', '33', 'abc'])
+def test_invalid_masks(mask):
+    assert parse_mask(mask) is None
+    with pytest.raises(ValueError):
+        mask_to_prefix(mask)
+    assert validate_profile({'interface': 'eth0', 'ip': '10.0.0.2', 'mask': mask}) is not None